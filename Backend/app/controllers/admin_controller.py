@@ -4,13 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from bson import ObjectId
 
-from app.database.mongo_client import db
+from app.database.mongo_client import async_db
 from app.utils.security import get_current_user_id
 from app.utils.logger import get_logger
 
 logger = get_logger()
 router = APIRouter(tags=["Admin"])
-users_collection = db["users"]
+users_collection = async_db["users"]
 
 # --- Admin Dependency ---
 
@@ -20,7 +20,7 @@ async def get_admin_user(user_id: str = Depends(get_current_user_id)):
     Fetches the user from DB based on ID from token and checks isAdmin flag.
     """
     try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = await users_collection.find_one({"_id": ObjectId(user_id)})
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid user ID format")
 
@@ -39,10 +39,10 @@ async def list_users():
     Excludes sensitive fields like OTP.
     """
     try:
-        users = list(users_collection.find(
+        users = await users_collection.find(
             {}, 
             {"otp": 0, "otp_expiry": 0}
-        ))
+        ).to_list(length=None)
         
         # Convert ObjectId to string for JSON serialization
         for user in users:
@@ -60,7 +60,7 @@ async def approve_user(user_id: str):
     Sets a user's status to 'approved'.
     """
     try:
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"status": "approved"}}
         )
@@ -80,7 +80,7 @@ async def reject_user(user_id: str):
     Sets a user's status to 'rejected'.
     """
     try:
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"status": "rejected"}}
         )
@@ -1,10 +1,12 @@
 # FILE: Backend/app/controllers/aggregation_controller.py
 
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, field_validator
 from datetime import datetime, date, timedelta
 from typing import Optional
-from app.database.mongo_client import db
+from app.database.mongo_client import async_db
 
 from app.services.aggeregation_service import AggregationService
 from app.utils.security import get_current_user_id
@@ -83,7 +85,8 @@ async def aggregate_meta_data(request: MetaAggregationRequest, user_id: str = De
         start_date_obj = datetime.strptime(request.start_date, '%Y-%m-%d').date()
         end_date_obj = datetime.strptime(request.end_date, '%Y-%m-%d').date()
         
-        raw_result = AggregationService.run_meta_aggregation(
+        raw_result = await asyncio.to_thread(
+            AggregationService.run_meta_aggregation,
             user_id=user_id,
             ad_account_id=request.ad_account_id,
             start_date=start_date_obj,
@@ -142,7 +145,8 @@ async def aggregate_google_data(request: GoogleAggregationRequest, user_id: str
         start_date_obj = datetime.strptime(request.start_date, '%Y-%m-%d').date()
         end_date_obj = datetime.strptime(request.end_date, '%Y-%m-%d').date()
         
-        raw_result = AggregationService.run_google_aggregation(
+        raw_result = await asyncio.to_thread(
+            AggregationService.run_google_aggregation,
             user_id=user_id,
             customer_id=request.ad_account_id,
             start_date=start_date_obj,
@@ -209,7 +213,8 @@ async def aggregate_shopify_data(request: ShopifyAggregationRequest, user_id: st
         start_date_obj = datetime.strptime(request.start_date, '%Y-%m-%d').date()
         end_date_obj = datetime.strptime(request.end_date, '%Y-%m-%d').date()
         
-        raw_result = AggregationService.run_shopify_aggregation(
+        raw_result = await asyncio.to_thread(
+            AggregationService.run_shopify_aggregation,
             user_id=user_id,
             start_date=start_date_obj,
             end_date=end_date_obj,
@@ -277,7 +282,7 @@ async def get_aggregated_meta_insights(
             "ad": "meta_daily_ad_insights"
         }
         
-        collection = db[collection_map[level]]
+        collection = async_db[collection_map[level]]
         id_field = f"{level}_id"
         group_id_field = f"${id_field}"
 
@@ -345,7 +350,7 @@ async def get_aggregated_meta_insights(
             }
         ]
 
-        results = list(collection.aggregate(pipeline))
+        results = await collection.aggregate(pipeline).to_list(length=None)
         logger.info(f"[META INSIGHTS] Got {len(results)} results from aggregation")
         
         if results:
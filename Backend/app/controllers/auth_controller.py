@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
+import hmac
 import random
 import string
 from datetime import datetime, timedelta
@@ -7,7 +8,7 @@ from bson import ObjectId
 from jose import jwt
 
 from app.utils.logger import get_logger
-from app.database.mongo_client import db
+from app.database.mongo_client import async_db, db
 from app.utils.email_sender import send_otp_email
 from app.config import config
 
@@ -19,6 +20,7 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 24 hours
 
 users_collection = db["users"]
+async_users_collection = async_db["users"]
 logger = get_logger()
 # --- Pydantic Models ---
 class UserCreate(BaseModel):
@@ -114,7 +116,9 @@ def verify_otp(data: OtpVerify):
     """Verifies the OTP and returns a JWT if successful."""
     user = users_collection.find_one({"email": data.email})
 
-    if not user or user.get("otp") != data.otp:
+    # Constant-time compare: a short-circuiting != leaks how many leading digits matched
+    stored_otp = (user or {}).get("otp")
+    if not stored_otp or not hmac.compare_digest(stored_otp.encode(), data.otp.encode()):
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
     if datetime.utcnow() > user.get("otp_expiry", datetime.min):
@@ -151,7 +155,7 @@ async def verify_oauth_session(payload: dict):
             raise HTTPException(status_code=401, detail="Invalid token type")
             
         user_id = decoded.get("sub")
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = await async_users_collection.find_one({"_id": ObjectId(user_id)})
         
         # Return a fresh, full-access session token
         access_token = create_access_token(data={
@@ -1,22 +1,28 @@
-from fastapi import APIRouter, Depends, Query, BackgroundTasks, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, Query, BackgroundTasks, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from app.controllers.auth_controller import create_access_token # Ensure this is accessible
-from pydantic import BaseModel
-from typing import List, Dict
+from pydantic import BaseModel, ConfigDict, ValidationError
+from cachetools import TTLCache
+from threading import Lock
+from typing import Optional
+from urllib.parse import quote, quote_plus
 from app.utils.logger import get_logger
-from app.utils.security import create_state_token, decode_token, get_current_user_id
+from app.utils.security import SlidingWindowLimiter, create_state_token, decode_state_token, get_current_user_id
 from app.services.meta_service import (
     exchange_code_for_token,
-    get_user_info,
     save_meta_connection,
     fetch_and_save,
-    run_historical_fetch,
+    run_historical_sync,
     get_demographics_data,
-    run_historical_demographics_fetch # <--- Verified Import
+    LEVEL_SPEC,
+    MetaLevel,
 )
-from app.database.mongo_client import save_or_update_platform_connection, get_platform_connection_details, db
-from app.config import config
-import requests
+from app.database.mongo_client import get_platform_connection_details, save_or_update_platform_connection, async_db
+from app.config.config import settings
+from app.utils.http_client import client as http_client
+from app.scheduler.job_runner import enqueue_job
+import orjson
 
 router = APIRouter(tags=["Meta Ads"])
 logger = get_logger()
@@ -26,17 +32,55 @@ API_VERSION = "v20.0"
 SCOPES = "ads_read,public_profile"
 PLATFORM_NAME = "meta"
 
-def _get_data_from_db(collection_name: str, ad_account_id: str) -> List[Dict]:
-    """Reads stored Meta data from MongoDB."""
+# Fixed part of the OAuth dialog URL, encoded once; only state varies per login
+_SCOPES_Q = quote_plus(SCOPES)
+_REDIRECT_Q = quote_plus(settings.META_REDIRECT_URI)
+_OAUTH_DIALOG_BASE = (
+    f"https://www.facebook.com/{API_VERSION}/dialog/oauth?"
+    f"client_id={settings.META_APP_ID}&redirect_uri={_REDIRECT_Q}&scope={_SCOPES_Q}&response_type=code"
+)
+
+# Graph API field set for account listing (per-level sets live in LEVEL_SPEC)
+AD_ACCOUNT_FIELDS = "id,name,business_name,account_status"
+
+# A user's ad-account list rarely changes; cache it per user. Entries are stamped
+# with the connection's connected_at, so a reconnect through any worker misses
+# here once that worker's connection cache (CONNECTION_CACHE_TTL) has expired.
+AD_ACCOUNTS_CACHE_TTL = 600
+_ad_accounts_cache: TTLCache = TTLCache(maxsize=10_000, ttl=AD_ACCOUNTS_CACHE_TTL)
+_ad_accounts_lock = Lock()  # safe to touch from threadpool (sync) routes too
+
+# Each sync enqueues heavy Graph API work: at most 2 per user per minute
+sync_limiter = SlidingWindowLimiter(limit=2, window_seconds=60)
+
+
+def _invalidate_ad_accounts(user_id: str):
+    with _ad_accounts_lock:
+        _ad_accounts_cache.pop(user_id, None)
+
+PAGE_LIMIT_DEFAULT = 1000
+PAGE_LIMIT_MAX = 1000
+
+
+async def _get_data_from_db(level: str, ad_account_id: str, limit: int, after: Optional[str]) -> dict:
+    """
+    Reads one page of stored Meta data from MongoDB, ordered by id.
+    Only the fields the dashboard renders are projected; `next` is the cursor
+    for the following page (None on the last page).
+    """
+    spec = LEVEL_SPEC[level]
+    query = {"ad_account_id": ad_account_id, "platform": PLATFORM_NAME}
+    if after:
+        query["id"] = {"$gt": after}
+    projection = {"_id": 0, **{field: 1 for field in spec["read_fields"]}}
     try:
-        cursor = db[collection_name].find(
-            {"ad_account_id": ad_account_id, "platform": "meta"},
-            {"_id": 0} 
-        )
-        return list(cursor)
+        cursor = async_db[spec["collection"]].find(query, projection).sort("id", 1).limit(limit)
+        data = await cursor.to_list(length=limit)
     except Exception as e:
-        logger.error(f"[DB Read] Failed to read {collection_name}: {e}")
-        return []
+        logger.error(f"[DB Read] Failed to read {spec['collection']}: {e}")
+        return {"data": [], "next": None}
+    next_cursor = data[-1].get("id") if len(data) == limit else None
+    return {"data": data, "next": next_cursor}
     
 # ---------------------------------------------------------------------------
 # 🔐 OAuth Flow
@@ -48,41 +92,35 @@ async def meta_login(user_id: str = Depends(get_current_user_id)):
         raise HTTPException(status_code=401, detail="User not authenticated")
 
     state_token = create_state_token({"sub": user_id})
-    auth_url = (
-    f"https://www.facebook.com/{API_VERSION}/dialog/oauth?"
-    f"client_id={config.settings.META_APP_ID}"
-    f"&redirect_uri={config.settings.META_REDIRECT_URI}"
-    f"&scope={SCOPES}"
-    f"&response_type=code"
-    f"&state={state_token}"
-    )
+    auth_url = f"{_OAUTH_DIALOG_BASE}&state={quote(state_token)}"
     logger.info(f"[Meta OAuth] Redirecting user {user_id}")
     return {"redirect_url": auth_url}
 
 
 @router.get("/callback")
-def meta_callback(code: str = Query(...), state: str = Query(...)):
+async def meta_callback(code: str = Query(...), state: str = Query(...)):
     """Handle Meta OAuth callback, save tokens and user mapping."""
     try:
-        payload = decode_token(state)
+        payload = decode_state_token(state)
         user_id = payload.get("sub")
         if not user_id:
             raise ValueError("Missing user ID in state")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid state: {e}")
 
-    token_data = exchange_code_for_token(code)
-    user_info = get_user_info(token_data.get("access_token"))
-    save_meta_connection(user_id, token_data.get("access_token"), token_data.get("expires_in"), user_info.get("id"))
+    token_data, user_info = await exchange_code_for_token(code)
+    await asyncio.to_thread(
+        save_meta_connection, user_id, token_data.get("access_token"), token_data.get("expires_in"), user_info.get("id")
+    )
+    _invalidate_ad_accounts(user_id)  # new token may see a different account set
 
     transfer_token = create_access_token(data={
         "sub": user_id, 
         "type": "oauth_handshake"
     })
 
-    # save_meta_connection(user_id, access_token, expires_in, platform_user_id)
     return RedirectResponse(
-        url=f"{config.settings.FRONTEND_URL}/select-meta-account?user_id={user_id}&token={transfer_token}"
+        url=f"{settings.FRONTEND_URL}/select-meta-account?user_id={user_id}&token={transfer_token}"
     )
 
 
@@ -91,28 +129,40 @@ def meta_callback(code: str = Query(...), state: str = Query(...)):
 # ---------------------------------------------------------------------------
 
 @router.get("/campaigns/{user_id}/{ad_account_id}")
-def get_campaigns(user_id: str, ad_account_id: str):
-    data = _get_data_from_db("campaigns", ad_account_id)
-    return {"data": data}
+async def get_campaigns(
+    user_id: str,
+    ad_account_id: str,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+):
+    return await _get_data_from_db("campaign", ad_account_id, limit, after)
 
 
 @router.get("/adsets/{user_id}/{ad_account_id}")
-def get_adsets(user_id: str, ad_account_id: str):
-    data = _get_data_from_db("adsets", ad_account_id)
-    return {"data": data}
+async def get_adsets(
+    user_id: str,
+    ad_account_id: str,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+):
+    return await _get_data_from_db("adset", ad_account_id, limit, after)
 
 
 @router.get("/ads/{user_id}/{ad_account_id}")
-def get_ads(user_id: str, ad_account_id: str):
-    data = _get_data_from_db("ads", ad_account_id)
-    return {"data": data}
+async def get_ads(
+    user_id: str,
+    ad_account_id: str,
+    limit: int = Query(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = None,
+):
+    return await _get_data_from_db("ad", ad_account_id, limit, after)
 
 
 # ---------------------------------------------------------------------------
 # 🔄 Sync Routes (Hits Meta API)
 # ---------------------------------------------------------------------------
 
-@router.post("/sync/recent/{user_id}/{ad_account_id}")
+@router.post("/sync/recent/{user_id}/{ad_account_id}", dependencies=[Depends(sync_limiter)])
 async def sync_recent_data(
     user_id: str, 
     ad_account_id: str, 
@@ -122,36 +172,27 @@ async def sync_recent_data(
     Fetches the latest list of Campaigns, AdSets, and Ads from Meta
     and updates the database. Call this when user clicks 'Refresh'.
     """
-    def _sync_task():
+    async def _sync_task():
         logger.info(f"[Meta Sync] Starting recent data sync for {ad_account_id}")
-        try:
-            # 1. Campaigns
-            fetch_and_save(
-                endpoint="campaigns",
-                user_id=user_id,
-                ad_account_id=ad_account_id,
-                fields="name,status,objective",
-                collection="campaigns"
-            )
-            # 2. AdSets
-            fetch_and_save(
-                endpoint="adsets",
-                user_id=user_id,
-                ad_account_id=ad_account_id,
-                fields="name,status,daily_budget,campaign_id",
-                collection="adsets"
-            )
-            # 3. Ads
-            fetch_and_save(
-                endpoint="ads",
-                user_id=user_id,
-                ad_account_id=ad_account_id,
-                fields="name,status,adset_id,creative{image_url,body}",
-                collection="ads"
-            )
-            logger.info(f"[Meta Sync] ✅ Recent data sync complete for {ad_account_id}")
-        except Exception as e:
+        # Campaigns, AdSets and Ads are independent listings: fetch them concurrently
+        results = await asyncio.gather(
+            *(
+                fetch_and_save(
+                    endpoint=spec["edge"],
+                    user_id=user_id,
+                    ad_account_id=ad_account_id,
+                    fields=spec["fields"],
+                    collection=spec["collection"]
+                )
+                for spec in LEVEL_SPEC.values()
+            ),
+            return_exceptions=True,
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        for e in failures:
             logger.error(f"[Meta Sync] Failed: {e}")
+        if not failures:
+            logger.info(f"[Meta Sync] ✅ Recent data sync complete for {ad_account_id}")
 
     background_tasks.add_task(_sync_task)
     return {"message": "Sync started. Data will update shortly."}
@@ -161,47 +202,66 @@ async def sync_recent_data(
 # 🧠 Ad Accounts + Selection
 # ---------------------------------------------------------------------------
 @router.get("/ad-accounts")
-def get_user_ad_accounts(user_id: str = Depends(get_current_user_id)):
-    """Return all ad accounts linked to Meta user."""
-    token = get_platform_connection_details(user_id, platform=PLATFORM_NAME)
-    if not token or "access_token" not in token:
+async def get_user_ad_accounts(user_id: str = Depends(get_current_user_id)):
+    """Return all ad accounts linked to Meta user (cached for AD_ACCOUNTS_CACHE_TTL)."""
+    # Checked before the cache: a disconnected user must not be served cached accounts
+    connection = await asyncio.to_thread(get_platform_connection_details, user_id, PLATFORM_NAME) or {}
+    access_token = connection.get("access_token")
+    if not access_token:
         raise HTTPException(status_code=404, detail="Reconnect Meta.")
 
+    stamp = connection.get("connected_at")
+    with _ad_accounts_lock:
+        cached = _ad_accounts_cache.get(user_id)
+    if cached is not None and cached[0] == stamp:
+        return {"accounts": cached[1]}
+
     url = f"https://graph.facebook.com/{API_VERSION}/me/adaccounts"
-    params = {"access_token": token["access_token"], "fields": "id,name,business_name,account_status"}
-    resp = requests.get(url, params=params)
+    params = {"access_token": access_token, "fields": AD_ACCOUNT_FIELDS}
+    resp = await http_client.get(url, params=params)
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
 
-    accounts = data.get("data", [])
-    for acc in accounts:
-        if acc.get("id", "").startswith("act_"):
-            acc["id"] = acc["id"][4:]
+    accounts = [{**acc, "id": acc.get("id", "").removeprefix("act_")} for acc in data.get("data", [])]
+    with _ad_accounts_lock:
+        _ad_accounts_cache[user_id] = (stamp, accounts)
     return {"accounts": accounts}
 
 
 class SelectedAccount(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     ad_account_id: str
     ad_account_name: str
 
 
-@router.post("/select-account")
-def select_ad_account(account: SelectedAccount, user_id: str = Depends(get_current_user_id), background_tasks: BackgroundTasks = None):
+@router.post(
+    "/select-account",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": SelectedAccount.model_json_schema()}}}},
+)
+async def select_ad_account(request: Request, user_id: str = Depends(get_current_user_id)):
     """Save user's selected ad account and trigger background sync."""
-    save_or_update_platform_connection(
+    # Validate straight from the raw bytes (pydantic-core JSON parser), skipping
+    # FastAPI's decode-to-dict + re-validate pass for this two-field body
+    try:
+        account = SelectedAccount.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    await asyncio.to_thread(
+        save_or_update_platform_connection,
         user_id, PLATFORM_NAME, {"ad_account_id": account.ad_account_id, "ad_account_name": account.ad_account_name}
     )
+    _invalidate_ad_accounts(user_id)
     # Trigger Combined Historical Fetch immediately after selection
-    if background_tasks:
-        background_tasks.add_task(run_historical_fetch, user_id, account.ad_account_id, "campaign")
-        background_tasks.add_task(run_historical_demographics_fetch, user_id, account.ad_account_id, "campaign")
-        background_tasks.add_task(run_historical_fetch, user_id, account.ad_account_id, "adset")
-        background_tasks.add_task(run_historical_demographics_fetch, user_id, account.ad_account_id, "adset")
-        background_tasks.add_task(run_historical_fetch, user_id, account.ad_account_id, "ad")
-        background_tasks.add_task(run_historical_demographics_fetch, user_id, account.ad_account_id, "ad")
-        # Also trigger for AdSets and Ads if needed, or rely on user to trigger full sync
-            
-    return {"message": "Ad account selection saved. Sync started."}
+    started = enqueue_job(
+        f"meta-historical:{user_id}:{account.ad_account_id}:all",
+        run_historical_sync, user_id, account.ad_account_id, tuple(LEVEL_SPEC),
+    )
+    if not started:
+        return {"message": "Ad account selection saved. Sync already running.", "status": "already_running"}
+
+    return {"message": "Ad account selection saved. Sync started.", "status": "started"}
 
 # ---------------------------------------------------------------------------
 # 🧾 Demographic Fetch
@@ -228,21 +288,18 @@ async def get_demographics(
 # 🧾 Historical & Demographic Fetch (COMBINED)
 # ---------------------------------------------------------------------------
 
-@router.post("/fetch_historical_{level}/{user_id}/{ad_account_id}")
+@router.post("/fetch_historical_{level}/{user_id}/{ad_account_id}", dependencies=[Depends(sync_limiter)])
 async def fetch_historical(
     user_id: str,
     ad_account_id: str,
     level: str,
-    background_tasks: BackgroundTasks,
 ):
     """Trigger historical data fetch (Main + Demographics)."""
-    # 1. Fetch main daily trends
-    background_tasks.add_task(run_historical_fetch, user_id, ad_account_id, level)
+    # Main daily trends + monthly demographics, run concurrently on the job pool
+    if not enqueue_job(f"meta-historical:{user_id}:{ad_account_id}:{level}", run_historical_sync, user_id, ad_account_id, (level,)):
+        return {"message": f"Historical {level} sync already running.", "status": "already_running"}
     
-    # 2. Fetch demographics (monthly aggregation)
-    background_tasks.add_task(run_historical_demographics_fetch, user_id, ad_account_id, level)
-    
-    return {"message": f"Historical {level} + Demographics sync started."}
+    return {"message": f"Historical {level} + Demographics sync started.", "status": "started"}
 
 
 # ---------------------------------------------------------------------------
@@ -250,42 +307,29 @@ async def fetch_historical(
 # ---------------------------------------------------------------------------
 
 @router.get("/demographics/data/{level}/{item_id}") 
-def get_item_demographics(
-    level: str,
+async def get_item_demographics(
+    level: MetaLevel,
     item_id: str,
     user_id: str = Depends(get_current_user_id)
 ):
     """
     Get stored demographics for a specific Campaign, AdSet, or Ad.
     """
-    collection_map = {
-        "campaign": "meta_demographics_campaign",
-        "adset": "meta_demographics_adset",
-        "ad": "meta_demographics_ad"
-    }
-    
-    if level not in collection_map:
-        raise HTTPException(status_code=400, detail="Invalid level")
-
-    id_field = f"{level}_id"
-    collection = db[collection_map[level]]
+    spec = LEVEL_SPEC[level]  # level already validated by the router
+    id_field = spec["id_field"]
+    collection = async_db[spec["demographics_collection"]]
 
     pipeline = [
         {"$match": {id_field: item_id, "user_id": user_id}},
-        # 🔥 STEP 1: Convert Strings to Numbers
-        {"$addFields": {
-            "num_impressions": {"$toInt": {"$ifNull": ["$impressions", 0]}},
-            "num_clicks": {"$toInt": {"$ifNull": ["$clicks", 0]}},
-            "num_spend": {"$toDouble": {"$ifNull": ["$spend", 0]}},
-            "num_reach": {"$toInt": {"$ifNull": ["$reach", 0]}},
-        }},
-        # 🔥 STEP 2: Sum the Converted Numbers
+        # Carry only the group keys + metrics into $group
+        {"$project": {"_id": 0, "age": 1, "gender": 1, "impressions": 1, "clicks": 1, "spend": 1, "reach": 1}},
+        # Metrics are stored numeric (cast in save_demographics), so sum directly
         {"$group": {
             "_id": {"age": "$age", "gender": "$gender"},
-            "impressions": {"$sum": "$num_impressions"},
-            "clicks": {"$sum": "$num_clicks"},
-            "spend": {"$sum": "$num_spend"},
-            "reach": {"$sum": "$num_reach"}
+            "impressions": {"$sum": "$impressions"},
+            "clicks": {"$sum": "$clicks"},
+            "spend": {"$sum": "$spend"},
+            "reach": {"$sum": "$reach"}
         }},
         {"$project": {
             "_id": 0,
@@ -299,5 +343,5 @@ def get_item_demographics(
         {"$sort": {"age": 1}}
     ]
 
-    results = list(collection.aggregate(pipeline))
+    results = await collection.aggregate(pipeline).to_list(length=None)
     return {"data": results}
\ No newline at end of file
@@ -4,28 +4,56 @@ Shopify Controller
 Complete OAuth flow with paginated data endpoints
 """
 
-from fastapi import APIRouter, Query, HTTPException, Request, Depends
-from fastapi.responses import RedirectResponse
-from pydantic import BaseModel
+import asyncio
+import re
+from fastapi import APIRouter, BackgroundTasks, Query, HTTPException, Request, Depends
+from fastapi.responses import ORJSONResponse, RedirectResponse, StreamingResponse
+from pydantic import BaseModel, StringConstraints
 from app.config.config import settings
-from typing import Optional
-from app.utils.security import create_state_token, decode_token, get_current_user_id
+from datetime import date, datetime, timezone
+from typing import Annotated, Literal, Optional
+from urllib.parse import urlencode
+from app.utils.security import create_state_token, decode_state_token, get_current_user_id
 from app.utils.logger import get_logger
 from app.services import shopify_service
-from app.database.mongo_client import save_or_update_platform_connection
+from app.database.mongo_client import (
+    clear_sync_watermarks_async,
+    save_or_update_platform_connection_async,
+    save_sync_watermarks_async,
+)
 from app.config import config
 
 router = APIRouter(tags=["Shopify"])
 logger = get_logger()
 
 SCOPES = "read_orders,read_all_orders,read_products,read_customers,read_inventory,read_analytics"
+SHOP_DOMAIN_PATTERN = r"^[a-z0-9][a-z0-9.\-]*\.[a-z0-9.\-]+$"
+# Accepts "handle", "handle.myshopify.com" or a pasted URL; captures the store handle
+_SHOP_RE = re.compile(r"^(?:https?://)?([a-z0-9][a-z0-9-]{0,59})(?:\.myshopify\.com)?/?$", re.I)
+# Callback shop must already be the bare myshopify domain Shopify signed
+_CALLBACK_SHOP_RE = re.compile(r"^([a-z0-9][a-z0-9-]{0,59})\.myshopify\.com\Z", re.I)
+
+# Static part of the authorize query string; only state varies per login
+_AUTHORIZE_QS = urlencode({
+    "client_id": settings.SHOPIFY_CLIENT_ID,
+    "scope": SCOPES,
+    "redirect_uri": settings.SHOPIFY_REDIRECT_URI,
+}, safe=",")  # keep Shopify's comma-delimited scope list readable
+
+
+async def _reset_watermarks_on_shop_change(user_id: str, shop_url: str):
+    """A different shop starts from a full sync, not the previous shop's watermarks."""
+    await clear_sync_watermarks_async(
+        user_id, "shopify", shopify_service.INCREMENTAL_RESOURCES,
+        match={"connected_platforms.shopify.shop_url": {"$ne": shop_url}},
+    )
 
 
 # ---------------------------------------------------------------------------
 # 🔐 OAuth Flow
 # ---------------------------------------------------------------------------
 @router.get("/login")
-def shopify_login(
+async def shopify_login(
     shop: str = Query(..., description="The merchant's shop domain"),
     current_user_id: str = Depends(get_current_user_id)
 ):
@@ -33,29 +61,24 @@ def shopify_login(
     if not shop:
         raise HTTPException(status_code=400, detail="Missing 'shop' parameter")
 
-    # Clean shop domain
-    shop = shop.strip().lower().replace("https://", "").replace("http://", "")
-    shop = shop.split("/")[0]
-    if "." not in shop or not all(c.isalnum() or c in ".-" for c in shop):
+    # Validate and normalize to the canonical myshopify domain in one pass
+    match = _SHOP_RE.match(shop.strip())
+    if not match:
         raise HTTPException(status_code=400, detail="Invalid shop domain")
+    shop = f"{match.group(1).lower()}.myshopify.com"
 
     # Create state token with user_id
     state_jwt = create_state_token({"sub": current_user_id, "shop": shop})
     
-    auth_url = (
-        f"https://{shop}/admin/oauth/authorize?"
-        f"client_id={settings.SHOPIFY_CLIENT_ID}"
-        f"&scope={SCOPES}"
-        f"&redirect_uri={settings.SHOPIFY_REDIRECT_URI}"
-        f"&state={state_jwt}"
-    )
+    # Compact JWS is base64url segments joined by ".": already URL-safe, no quoting needed
+    auth_url = f"https://{shop}/admin/oauth/authorize?{_AUTHORIZE_QS}&state={state_jwt}"
     
-    logger.info(f"[Shopify OAuth] User={current_user_id} initiating install for {shop}")
+    logger.info("[Shopify OAuth] User=%s initiating install for %s", current_user_id, shop)
     return {"redirect_url": auth_url}
 
 
 @router.get("/callback")
-def shopify_callback(
+async def shopify_callback(
     request: Request,
     code: str,
     shop: str,
@@ -64,11 +87,17 @@ def shopify_callback(
     state: str
 ):
     """Handle Shopify OAuth callback and redirect to shop selection."""
-    logger.info(f"[Shopify Callback] Received callback for {shop}")
+    logger.debug("[Shopify Callback] Received callback for %s", shop)
+
+    # shop becomes the token-exchange host: only ever post to *.myshopify.com
+    match = _CALLBACK_SHOP_RE.match(shop)
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid shop domain")
+    shop = f"{match.group(1).lower()}.myshopify.com"
 
     # Verify state and extract user_id
     try:
-        payload = decode_token(state)
+        payload = decode_state_token(state)
         user_id = payload.get("sub")
         if not user_id:
             raise ValueError("Missing user ID in state")
@@ -77,16 +106,18 @@ def shopify_callback(
 
     # Verify HMAC
     if not shopify_service.verify_shopify_hmac(
-        dict(request.query_params),
+        request.query_params,
+        hmac,
         settings.SHOPIFY_CLIENT_SECRET
     ):
         raise HTTPException(status_code=400, detail="Invalid HMAC signature")
 
     # Exchange code for access token
-    access_token = shopify_service.exchange_code_for_token(shop, code)
+    access_token = await shopify_service.exchange_code_for_token(shop, code)
 
     # Save connection with scopes
-    save_or_update_platform_connection(
+    await _reset_watermarks_on_shop_change(user_id, shop)
+    await save_or_update_platform_connection_async(
         user_id=user_id,
         platform="shopify",
         platform_data={
@@ -97,7 +128,10 @@ def shopify_callback(
         }
     )
 
-    logger.info(f"[Shopify Callback] ✅ Saved connection for user={user_id}, shop={shop}")
+    logger.info("[Shopify Callback] ✅ Saved connection for user=%s, shop=%s", user_id, shop)
+
+    # Overlaps the redirect round-trip: the first /select-shopify data call finds warm caches
+    shopify_service.schedule_warmup(user_id, shop, access_token)
     
     return RedirectResponse(
         url=f"{config.settings.FRONTEND_URL}/select-shopify?user_id={user_id}"
@@ -108,16 +142,17 @@ def shopify_callback(
 # 🪙 Shop Confirmation
 # ---------------------------------------------------------------------------
 class ShopConfirmation(BaseModel):
-    shop_url: str
+    shop_url: Annotated[str, StringConstraints(strip_whitespace=True, to_lower=True, pattern=SHOP_DOMAIN_PATTERN)]
 
 
 @router.post("/confirm-shop")
-def confirm_shop(
+async def confirm_shop(
     confirmation: ShopConfirmation,
     user_id: str = Depends(get_current_user_id)
 ):
     """User confirms the Shopify shop selection."""
-    save_or_update_platform_connection(
+    await _reset_watermarks_on_shop_change(user_id, confirmation.shop_url)
+    await save_or_update_platform_connection_async(
         user_id=user_id,
         platform="shopify",
         platform_data={
@@ -126,7 +161,7 @@ def confirm_shop(
         }
     )
     
-    logger.info(f"[Shopify] ✅ User {user_id} confirmed shop {confirmation.shop_url}")
+    logger.info("[Shopify] ✅ User %s confirmed shop %s", user_id, confirmation.shop_url)
     return {
         "message": "Shopify shop confirmed",
         "shop_url": confirmation.shop_url
@@ -134,454 +169,255 @@ def confirm_shop(
 
 
 # ---------------------------------------------------------------------------
-# 📊 Data Endpoints (Paginated)
+# 🔄 Sync Endpoint (Initial/Full Refresh)
 # ---------------------------------------------------------------------------
 
-@router.get("/orders/{user_id}")
-def fetch_orders(
+SYNC_RESOURCES = ("orders", "products", "customers")
+
+
+@router.post("/sync/{user_id}")
+async def sync_shopify_data(
     user_id: str,
-    page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(50, ge=1, le=250, description="Items per page"),
-    start_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    start_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    end_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    full: bool = Query(False, description="Ignore the last-sync watermark and re-pull everything"),
     current_user_id: str = Depends(get_current_user_id)
 ):
     """
-    Fetch Shopify orders with pagination.
-    Returns cached data from MongoDB.
+    Sync ALL Shopify data from API and save to MongoDB.
+    Without a date range, products and customers resume from the last sync
+    (only records updated since then); pass full=true for a full refresh.
+    This may take 60-120s for large stores!
     """
     if user_id != current_user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    return shopify_service.fetch_and_save_paginated(
-        resource_type="orders",
-        user_id=user_id,
-        page=page,
-        limit=limit,
-        start_date=start_date,
-        end_date=end_date,
-    )
+    details = await shopify_service.get_connection_async(user_id)
+    shop_url, access_token = details["shop_url"], details["access_token"]
+
+    # Watermarks only advance on unranged syncs. Each resource's new watermark is the
+    # newest updatedAt it actually received, capped at the sync start so records
+    # updated mid-sync behind the cursor are picked up next time
+    ranged = bool(start_date or end_date)
+    synced_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    since = {
+        resource: None if ranged or full else details.get(f"last_sync_{resource}")
+        for resource in shopify_service.INCREMENTAL_RESOURCES
+    }
 
+    # Stream each resource into MongoDB page by page — the three resources page concurrently
+    results = dict(zip(SYNC_RESOURCES, await asyncio.gather(
+        shopify_service.sync_and_save(
+            "orders", user_id, shop_url,
+            shopify_service.iter_order_pages(shop_url, access_token, start_date, end_date),
+        ),
+        shopify_service.sync_and_save(
+            "products", user_id, shop_url,
+            shopify_service.iter_product_pages(shop_url, access_token, start_date, end_date, since["products"]),
+        ),
+        shopify_service.sync_and_save(
+            "customers", user_id, shop_url,
+            shopify_service.iter_customer_pages(shop_url, access_token, start_date, end_date, since["customers"]),
+        ),
+        return_exceptions=True,
+    )))
+    failed = [resource for resource, result in results.items() if isinstance(result, BaseException)]
+
+    # A failed resource keeps its old watermark; the ones that completed still advance
+    if not ranged:
+        watermarks = {
+            resource: min(results[resource]["latest_updated_at"], synced_at)
+            for resource in shopify_service.INCREMENTAL_RESOURCES
+            if resource not in failed and results[resource]["latest_updated_at"]
+        }
+        if watermarks:
+            await save_sync_watermarks_async(user_id, "shopify", watermarks)
 
-@router.get("/products/{user_id}")
-def fetch_products(
-    user_id: str,
-    page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(50, ge=1, le=250, description="Items per page"),
-    start_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    current_user_id: str = Depends(get_current_user_id)
-):
-    """
-    Fetch Shopify products with pagination.
-    Returns cached data from MongoDB.
-    """
-    if user_id != current_user_id:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    if failed:
+        logger.error("[Shopify Sync] Failed for %s: %s", user_id, ", ".join(failed))
+        raise HTTPException(status_code=500, detail=f"Sync failed for: {', '.join(failed)}")
+
+    return {
+        "message": "Shopify data synced successfully",
+        **{f"{resource}_synced": result["count"] for resource, result in results.items()},
+        "incremental": {resource: bool(watermark) for resource, watermark in since.items()},
+    }
 
-    return shopify_service.fetch_and_save_paginated(
-        resource_type="products",
-        user_id=user_id,
-        page=page,
-        limit=limit,
-        start_date=start_date,
-        end_date=end_date,
-    )
 
+BULK_RESOURCES = {
+    "orders": shopify_service.iter_bulk_orders,
+    "products": shopify_service.iter_bulk_products,
+}
 
-@router.get("/customers/{user_id}")
-def fetch_customers(
+
+@router.post("/sync/bulk/{user_id}")
+async def bulk_sync_shopify_data(
     user_id: str,
-    page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(50, ge=1, le=250, description="Items per page"),
-    start_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    background_tasks: BackgroundTasks,
+    start_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    end_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
     current_user_id: str = Depends(get_current_user_id)
 ):
     """
-    Fetch Shopify customers with pagination.
-    Returns cached data from MongoDB.
+    Full orders + products export through Shopify's Bulk Operations API.
+    Shopify runs the query server-side; results stream into MongoDB in the background.
     """
     if user_id != current_user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    return shopify_service.fetch_and_save_paginated(
-        resource_type="customers",
-        user_id=user_id,
-        page=page,
-        limit=limit,
-        start_date=start_date,
-        end_date=end_date,
-    )
+    details = await shopify_service.get_connection_async(user_id)
+
+    async def _bulk_task():
+        # Shopify allows one bulk query per shop at a time, so resources run in sequence
+        for resource_type, iter_records in BULK_RESOURCES.items():
+            try:
+                records = iter_records(details["shop_url"], details["access_token"], start_date, end_date)
+                await shopify_service.bulk_fetch_and_save(resource_type, user_id, records)
+            except Exception as e:
+                logger.error("[Shopify Bulk] %s export failed for %s: %s", resource_type, user_id, e)
+
+    background_tasks.add_task(_bulk_task)
+    return {"message": "Bulk sync started. Data will update shortly."}
 
 
 # ---------------------------------------------------------------------------
-# 🔄 Sync Endpoint (Initial/Full Refresh)
+# 🧭 Dashboard Endpoint (all resources in one round-trip)
 # ---------------------------------------------------------------------------
+DASHBOARD_FETCHERS = {
+    "orders": shopify_service.get_all_orders,
+    "products": shopify_service.get_all_products,
+    "customers": shopify_service.get_all_customers,
+    "collections": shopify_service.get_all_collections,
+    "inventory": shopify_service.get_inventory_levels,
+}
 
-@router.post("/sync/{user_id}")
-def sync_shopify_data(
+
+@router.get("/dashboard/{user_id}")
+async def fetch_dashboard(
     user_id: str,
-    start_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    start_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    end_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
     current_user_id: str = Depends(get_current_user_id)
 ):
     """
-    Sync ALL Shopify data from API and save to MongoDB.
-    Use this for initial sync or full refresh.
-    This may take 60-120s for large stores!
+    Fetch and save every Shopify resource for the dashboard in one call.
+    One auth + connection lookup; the five cursor pulls run concurrently.
     """
     if user_id != current_user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    details = shopify_service.get_connection_or_403(user_id, current_user_id)
-    
-    try:
-        # Fetch all data from Shopify API
-        orders_result = shopify_service.fetch_and_save(
-            "orders",
-            user_id,
-            shopify_service.get_all_orders,
-            details["shop_url"],
-            details["access_token"],
-            start_date=start_date,
-            end_date=end_date,
-        )
-        
-        products_result = shopify_service.fetch_and_save(
-            "products",
+    details = await shopify_service.get_connection_async(user_id)
+    results = await asyncio.gather(*(
+        shopify_service.fetch_and_save(
+            resource_type,
             user_id,
-            shopify_service.get_all_products,
+            func,
             details["shop_url"],
             details["access_token"],
             start_date=start_date,
             end_date=end_date,
         )
-        
-        customers_result = shopify_service.fetch_and_save(
-            "customers",
-            user_id,
-            shopify_service.get_all_customers,
-            details["shop_url"],
-            details["access_token"],
-            start_date=start_date,
-            end_date=end_date,
-        )
-        
-        return {
-            "message": "Shopify data synced successfully",
-            "orders_synced": orders_result["count"],
-            "products_synced": products_result["count"],
-            "customers_synced": customers_result["count"],
-        }
-    except Exception as e:
-        logger.error(f"[Shopify Sync] Failed: {e}")
-        raise HTTPException(status_code=500, detail="Sync failed")
+        for resource_type, func in DASHBOARD_FETCHERS.items()
+    ))
+
+    # Raw Shopify nodes are already JSON-native: skip jsonable_encoder's recursive walk
+    return ORJSONResponse({
+        "user_id": user_id,
+        **{
+            resource_type: {"data": result["data"], "count": result["count"]}
+            for resource_type, result in zip(DASHBOARD_FETCHERS, results)
+        },
+    })
 
 
-@router.get("/collections/{user_id}")
-def fetch_collections(
+# ---------------------------------------------------------------------------
+# 🛰️ Live Endpoints (fetched from Shopify and saved, streamed as NDJSON)
+# ---------------------------------------------------------------------------
+LIVE_RESOURCES = {
+    "collections": shopify_service.iter_collection_pages,
+    "inventory": shopify_service.iter_inventory_pages,
+}
+
+
+async def _fetch_live(
+    resource_type: str,
     user_id: str,
-    start_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
 ):
-    """Fetch Shopify collections."""
+    """Pull one LIVE_RESOURCES entry from Shopify, persisting and streaming it page by page."""
     if user_id != current_user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    details = shopify_service.get_connection_or_403(user_id, current_user_id)
-    result = shopify_service.fetch_and_save(
-        "collections",
-        user_id,
-        shopify_service.get_all_collections,
+    details = await shopify_service.get_connection_async(user_id)
+    pages = LIVE_RESOURCES[resource_type](
         details["shop_url"],
         details["access_token"],
         start_date=start_date,
         end_date=end_date,
     )
 
-    return {
-        "data": result.get("data", []),
-        "count": result.get("count", 0),
-        "user_id": user_id,
-    }
+    return StreamingResponse(
+        shopify_service.stream_and_save(resource_type, user_id, pages),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/collections/{user_id}")
+async def fetch_collections(
+    user_id: str,
+    start_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    end_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Stream Shopify collections as NDJSON."""
+    return await _fetch_live("collections", user_id, current_user_id, start_date, end_date)
 
 
 @router.get("/inventory/{user_id}")
-def fetch_inventory_levels(
+async def fetch_inventory_levels(
     user_id: str,
-    start_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    start_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    end_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
     current_user_id: str = Depends(get_current_user_id)
 ):
-    """Fetch Shopify inventory levels."""
+    """Stream Shopify inventory levels as NDJSON."""
+    return await _fetch_live("inventory", user_id, current_user_id, start_date, end_date)
+
+
+# ---------------------------------------------------------------------------
+# 📊 Data Endpoints (Paginated)
+# ---------------------------------------------------------------------------
+# Registered last: the /{resource}/{user_id} pattern would otherwise shadow
+# the fixed /collections and /inventory paths above.
+CachedResource = Literal["orders", "products", "customers"]
+
+
+@router.get("/{resource}/{user_id}")
+async def fetch_cached_resource(
+    resource: CachedResource,
+    user_id: str,
+    page: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(50, ge=1, le=250, description="Items per page"),
+    start_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    end_date: Optional[date] = Query(None, description="YYYY-MM-DD"),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """
+    Fetch Shopify orders, products or customers with pagination.
+    Returns cached data from MongoDB.
+    """
     if user_id != current_user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    details = shopify_service.get_connection_or_403(user_id, current_user_id)
-    result = shopify_service.fetch_and_save(
-        "inventory",
-        user_id,
-        shopify_service.get_inventory_levels,
-        details["shop_url"],
-        details["access_token"],
+    result = await shopify_service.fetch_and_save_paginated(
+        resource_type=resource,
+        user_id=user_id,
+        page=page,
+        limit=limit,
         start_date=start_date,
         end_date=end_date,
     )
-
-    return {
-        "data": result.get("data", []),
-        "count": result.get("count", 0),
-        "user_id": user_id,
-    }
-# """
-# Shopify Controller
-# ------------------
-# Handles OAuth authentication, callback verification, and data fetch routes
-# for Shopify platform integrations.
-# """
-
-# from fastapi import APIRouter, Query, HTTPException, Request, Depends
-# from fastapi.responses import RedirectResponse
-# from app.config.config import settings
-# from app.utils.security import create_state_token, get_current_user_id
-# from app.utils.logger import get_logger
-# from app.services import shopify_service
-
-# router = APIRouter(prefix="/shopify", tags=["Shopify"])
-# logger = get_logger()
-
-# SCOPES = "read_orders,read_all_orders,read_products,read_customers,read_inventory,read_analytics"
-
-
-# @router.get("/login")
-# def shopify_login(
-#     shop: str = Query(..., description="The merchant's shop domain"),
-#     current_user_id: str = Depends(get_current_user_id)
-# ):
-#     """
-#     Begin Shopify OAuth installation flow.
-#     """
-#     if not shop:
-#         raise HTTPException(status_code=400, detail="Missing 'shop' parameter")
-
-#     shop = shop.strip().lower().replace("https://", "").replace("http://", "")
-#     shop = shop.split("/")[0]
-#     if "." not in shop or not all(c.isalnum() or c in ".-" for c in shop):
-#         raise HTTPException(status_code=400, detail="Invalid shop domain")
-
-#     state_jwt = create_state_token({"sub": current_user_id})
-#     auth_url = (
-#         f"https://{shop}/admin/oauth/authorize?"
-#         f"client_id={settings.SHOPIFY_CLIENT_ID}"
-#         f"&scope={SCOPES}"
-#         f"&redirect_uri={settings.SHOPIFY_REDIRECT_URI}"
-#         f"&state={state_jwt}"
-#     )
-#     logger.info(f"[Shopify OAuth] User={current_user_id} initiating install for {shop}")
-#     return {"redirect_url": auth_url}
-
-
-# @router.get("/callback")
-# def shopify_callback(request: Request, code: str, shop: str, state: str, timestamp: str):
-#     """
-#     Handle Shopify OAuth callback and save platform connection.
-#     """
-#     logger.info(f"[Shopify Callback] Received callback for {shop}")
-
-#     # Verify state
-#     payload = shopify_service.decode_token(state)
-#     user_id = payload.get("sub")
-#     if not user_id:
-#         raise HTTPException(status_code=400, detail="Invalid state token")
-
-#     # Verify HMAC
-#     if not shopify_service.verify_shopify_hmac(dict(request.query_params), settings.SHOPIFY_CLIENT_SECRET):
-#         raise HTTPException(status_code=400, detail="Invalid HMAC signature")
-
-#     # Verify timestamp
-#     try:
-#         ts = int(timestamp)
-#         if abs(time.time() - ts) > 3600:
-#             raise HTTPException(status_code=400, detail="Stale timestamp")
-#     except Exception:
-#         pass
-
-#     # Exchange code for token
-#     access_token = shopify_service.exchange_code_for_token(shop, code)
-
-#     # Save connection
-#     shopify_service.save_or_update_platform_connection(
-#         user_id=user_id,
-#         platform="shopify",
-#         platform_data={"access_token": access_token, "shop_url": shop}
-#     )
-#     logger.info(f"[Shopify Callback] ✅ Saved connection for user={user_id}, shop={shop}")
-#     return RedirectResponse(url=f"http://localhost:8080/select-shopify?user_id={user_id}")
-
-
-# # --------------------------- Data Endpoints --------------------------- #
-
-# @router.get("/orders/{user_id}")
-# def fetch_orders(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "orders", user_id, shopify_service.get_all_orders,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/products/{user_id}")
-# def fetch_products(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "products", user_id, shopify_service.get_all_products,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/customers/{user_id}")
-# def fetch_customers(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "customers", user_id, shopify_service.get_all_customers,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/collections/{user_id}")
-# def fetch_collections(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "collections", user_id, shopify_service.get_all_collections,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/inventory/{user_id}")
-# def fetch_inventory(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "inventory", user_id, shopify_service.get_inventory_levels,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-
-# """
-# Shopify Controller
-# ------------------
-# Handles OAuth authentication, callback verification, and data fetch routes
-# for Shopify platform integrations.
-# """
-
-# from fastapi import APIRouter, Query, HTTPException, Request, Depends
-# from fastapi.responses import RedirectResponse
-# from app.config.config import settings
-# from app.utils.security import create_state_token, get_current_user_id
-# from app.utils.logger import get_logger
-# from app.services import shopify_service
-
-# router = APIRouter(tags=["Shopify"])
-# logger = get_logger()
-
-# SCOPES = "read_orders,read_all_orders,read_products,read_customers,read_inventory,read_analytics"
-
-
-# @router.get("/login")
-# def shopify_login(shop: str = Query(..., description="The merchant's shop domain")):
-#     """
-#     Public Shopify OAuth installation flow (no JWT required).
-#     """
-#     if not shop:
-#         raise HTTPException(status_code=400, detail="Missing 'shop' parameter")
-
-#     shop = shop.strip().lower().replace("https://", "").replace("http://", "")
-#     shop = shop.split("/")[0]
-#     if "." not in shop or not all(c.isalnum() or c in ".-" for c in shop):
-#         raise HTTPException(status_code=400, detail="Invalid shop domain")
-
-#     redirect_uri = f"{settings.SHOPIFY_REDIRECT_URI}"
-#     auth_url = (
-#         f"https://{shop}/admin/oauth/authorize?"
-#         f"client_id={settings.SHOPIFY_CLIENT_ID}"
-#         f"&scope={SCOPES}"
-#         f"&redirect_uri={redirect_uri}"
-#         f"&state=dummy_state"
-#     )
-#     # logger.info(f"[Shopify OAuth] Redirecting user {current_user_id} for shop: {shop}")
-#     logger.info(f"[Shopify OAuth] Constructed auth URL: {auth_url}")
-#     try:
-#         return {"redirect_url": auth_url}
-#     except Exception as e:
-#         logger.exception(f"[Shopify OAuth] Failed to create RedirectResponse: {e}")
-#         raise HTTPException(status_code=500, detail="Failed to initiate Shopify login redirect.")
-
-
-# @router.get("/callback")
-# def shopify_callback(request: Request, code: str, shop: str, hmac: str, timestamp: str, state: str = None):
-#     """
-#     Handle Shopify OAuth callback and save access token.
-#     """
-#     from app.services import shopify_service
-
-#     if not shopify_service.verify_shopify_hmac(dict(request.query_params), settings.SHOPIFY_CLIENT_SECRET):
-#         raise HTTPException(status_code=400, detail="Invalid HMAC signature")
-
-#     access_token = shopify_service.exchange_code_for_token(shop, code)
-#     shopify_service.save_or_update_platform_connection(
-#         user_id="69024f373451fdc6356105af",  # temporary link to your test user
-#         platform="shopify",
-#         platform_data={"access_token": access_token, "shop_url": shop}
-#     )
-#     logger.info(f"[Shopify Callback] ✅ Connected virality-test-shop.myshopify.com")
-#     return {"message": "Shopify connection successful", "shop": shop}
-
-
-# # --------------------------- Data Endpoints --------------------------- #
-
-# @router.get("/orders/{user_id}")
-# def fetch_orders(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "orders", user_id, shopify_service.get_all_orders,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/products/{user_id}")
-# def fetch_products(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "products", user_id, shopify_service.get_all_products,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/customers/{user_id}")
-# def fetch_customers(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "customers", user_id, shopify_service.get_all_customers,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/collections/{user_id}")
-# def fetch_collections(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "collections", user_id, shopify_service.get_all_collections,
-#         details["shop_url"], details["access_token"]
-#     )
-
-
-# @router.get("/inventory/{user_id}")
-# def fetch_inventory(user_id: str, current_user_id: str = Depends(get_current_user_id)):
-#     details = shopify_service.get_connection_or_403(user_id, current_user_id)
-#     return shopify_service.fetch_and_save(
-#         "inventory", user_id, shopify_service.get_inventory_levels,
-#         details["shop_url"], details["access_token"]
-#     )
-
+    # _id is stripped in the service; orjson encodes the remaining datetimes natively
+    return ORJSONResponse(result)
@@ -1,20 +1,24 @@
 # FILE: app/controllers/user_controller.py
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel, EmailStr
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional
 
 from app.services.user_service import UserService
 from app.utils.security import get_current_user_id
 from app.utils.logger import get_logger
 
-router = APIRouter( tags=["User"])
+router = APIRouter(tags=["User"])
 logger = get_logger()
 
 # ------------------------------------------------------------
 # Response Models
 # ------------------------------------------------------------
 class UserProfile(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     id: str
     name: Optional[str] = "User"
     email: Optional[EmailStr] = None
@@ -23,7 +27,7 @@ class UserProfile(BaseModel):
 # ------------------------------------------------------------
 # Endpoints
 # ------------------------------------------------------------
-@router.get("/{user_id}/platforms", response_model=dict)
+@router.get("/{user_id}/platforms", response_model=None)
 async def get_user_platforms(
     user_id: str,
     current_user_id: str = Depends(get_current_user_id),
@@ -32,13 +36,14 @@ async def get_user_platforms(
     Retrieves the platform connection status (Google, Meta, Shopify, etc.)
     for the given user ID.
     """
-    logger.info(f"[UserController] GET /user/{user_id}/platforms requested by {current_user_id}")
-
     if user_id != current_user_id:
-        logger.warning(f"[UserController] Unauthorized access: {current_user_id} → {user_id}")
+        logger.warning("[UserController] Unauthorized access: %s → %s", current_user_id, user_id)
         raise HTTPException(status_code=403, detail="Not authorized to access this user's data")
 
-    return UserService.get_platform_connections(user_id)
+    logger.info("[UserController] GET /user/%s/platforms requested by %s", user_id, current_user_id)
+
+    # Flat JSON-native status dict: skip response validation and jsonable_encoder
+    return ORJSONResponse(await asyncio.to_thread(UserService.get_platform_connections, user_id))
 
 
 @router.delete("/{user_id}/platforms/{platform}", response_model=dict)
@@ -51,13 +56,13 @@ async def disconnect_platform(
     Disconnects a specific platform (google, meta, shopify) for the given user.
     Removes tokens and connection data from the database.
     """
-    logger.info(f"[UserController] DELETE /user/{user_id}/platforms/{platform} requested by {current_user_id}")
-
     if user_id != current_user_id:
-        logger.warning(f"[UserController] Unauthorized disconnect: {current_user_id} → {user_id}")
+        logger.warning("[UserController] Unauthorized disconnect: %s → %s", current_user_id, user_id)
         raise HTTPException(status_code=403, detail="Not authorized to modify this user's data")
 
-    return UserService.disconnect_platform(user_id, platform)
+    logger.info("[UserController] DELETE /user/%s/platforms/%s requested by %s", user_id, platform, current_user_id)
+
+    return await asyncio.to_thread(UserService.disconnect_platform, user_id, platform)
 
 
 @router.get("/{user_id}/profile", response_model=UserProfile)
@@ -68,11 +73,11 @@ async def get_user_profile(
     """
     Returns the authenticated user's basic profile info (id, name, email).
     """
-    logger.info(f"[UserController] GET /user/{user_id}/profile requested by {current_user_id}")
-
     if user_id != current_user_id:
-        logger.warning(f"[UserController] Unauthorized access: {current_user_id} → {user_id}")
+        logger.warning("[UserController] Unauthorized access: %s → %s", current_user_id, user_id)
         raise HTTPException(status_code=403, detail="Not authorized to access this user's profile")
 
-    profile_data = UserService.get_profile(user_id)
-    return UserProfile(**profile_data)
+    logger.info("[UserController] GET /user/%s/profile requested by %s", user_id, current_user_id)
+
+    # Validated once against response_model; building a UserProfile here would validate twice
+    return await asyncio.to_thread(UserService.get_profile, user_id)
@@ -9,7 +9,16 @@ Key improvements:
 - Consistent exception handling and comments
 """
 
-from pymongo import MongoClient, UpdateOne
+import atexit
+import importlib.util
+from itertools import islice
+from operator import itemgetter
+from threading import Lock
+from typing import Iterable, Optional
+from cachetools import TLRUCache
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
 from datetime import datetime, timedelta
 from fastapi import HTTPException
@@ -21,8 +30,29 @@ logger = get_logger()
 # ------------------------------------------------------------
 # ⚙️ MongoDB Initialization
 # ------------------------------------------------------------
-client = MongoClient(config.settings.MONGO_URI)
+# One tuned pool per driver per worker process (security and analytics reuse it).
+# maxPoolSize covers the threads that can hit Mongo at once: the default asyncio
+# executor, the Shopify write pool and the scheduler. zstd is only offered when
+# the optional zstandard module is installed (pymongo warns on every client
+# otherwise); zlib ships with Python.
+MONGO_COMPRESSORS = "zstd,zlib" if importlib.util.find_spec("zstandard") else "zlib"
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 5,
+    "compressors": MONGO_COMPRESSORS,
+    "retryWrites": True,
+    "serverSelectionTimeoutMS": 5000,
+    "socketTimeoutMS": 60000,  # Analytics aggregations can run long
+    "appname": "virality-backend",
+}
+
+client = MongoClient(config.settings.MONGO_URI, **MONGO_CLIENT_OPTIONS)
 db = client[config.settings.DB_NAME]
+atexit.register(client.close)
+
+# Async handle for reads awaited directly from async routes (same database)
+async_client = AsyncIOMotorClient(config.settings.MONGO_URI, **MONGO_CLIENT_OPTIONS)
+async_db = async_client[config.settings.DB_NAME]
 
 # Core collections
 users_collection = db["users"]
@@ -36,6 +66,40 @@ meta_daily_ad_insights_collection = db["meta_daily_ad_insights"]
 meta_daily_campaign_insights_collection = db["meta_daily_campaign_insights"]
 google_daily_insights_collection = db["google_daily_insights"]
 
+# ------------------------------------------------------------
+# 🗂️ Indexes
+# ------------------------------------------------------------
+ITEM_COLLECTIONS = ("campaigns", "adsets", "ads")
+SHOPIFY_ITEM_COLLECTIONS = tuple(
+    f"shopify_{name}" for name in ("orders", "products", "customers", "collections", "inventory")
+)
+
+
+def ensure_indexes():
+    """
+    Create the compound indexes behind the read routes and upserts (idempotent).
+    - campaigns/adsets/ads: {ad_account_id, platform, id} for _get_data_from_db paging
+    - meta_demographics_<level>: {<level>_id, user_id, age} for the item demographics $match
+    - save_items collections: {id, platform}, the per-item upsert key
+    - shopify_daily_insights: {user_id, platform, date_start}, the daily upsert key
+    """
+    try:
+        for name in ITEM_COLLECTIONS:
+            db[name].create_index([("ad_account_id", ASCENDING), ("platform", ASCENDING), ("id", ASCENDING)])
+        for level in ("campaign", "adset", "ad"):
+            db[f"meta_demographics_{level}"].create_index(
+                [(f"{level}_id", ASCENDING), ("user_id", ASCENDING), ("age", ASCENDING)]
+            )
+        for name in (*ITEM_COLLECTIONS, *SHOPIFY_ITEM_COLLECTIONS):
+            db[name].create_index([("id", ASCENDING), ("platform", ASCENDING)])
+        db["shopify_daily_insights"].create_index(
+            [("user_id", ASCENDING), ("platform", ASCENDING), ("date_start", ASCENDING)]
+        )
+        logger.info("[DB][Indexes] Ensured read-path and upsert indexes.")
+    except Exception as e:
+        logger.error(f"[DB][Indexes] ensure_indexes failed: {e}", exc_info=True)
+
+
 # ------------------------------------------------------------
 # 🧩 UTILITY HELPERS
 # ------------------------------------------------------------
@@ -50,11 +114,11 @@ def _resolve_user_query(user_id: str):
 # ============================================================
 # 👤 USER MANAGEMENT
 # ============================================================
-def get_user_by_id(user_id: str):
-    """Retrieve user by ObjectId or email."""
+def get_user_by_id(user_id: str, projection: Optional[dict] = None):
+    """Retrieve user by ObjectId or email (optionally only the projected fields)."""
     query = _resolve_user_query(user_id)
     try:
-        user = users_collection.find_one(query)
+        user = users_collection.find_one(query, projection)
         if not user:
             logger.warning(f"[DB][User] User not found for {user_id}")
         return user
@@ -99,11 +163,32 @@ def get_user_connection_status(user_id: str):
 # ============================================================
 # 🔗 PLATFORM CONNECTION MANAGEMENT
 # ============================================================
-def save_or_update_platform_connection(user_id: str, platform: str, platform_data: dict):
-    """
-    Stores access tokens, expiry, IDs, and other platform details
-    inside connected_platforms.<platform>.
-    """
+# Cache-aside for connection details (tokens change rarely, are read on most
+# platform routes). Per-entry TTL is capped by the stored token expiry.
+# Writes only invalidate their own worker's cache, so the TTL bounds how long other
+# workers keep serving a replaced or disconnected (revoked) token. 15s still lets
+# the burst of platform calls behind one dashboard load share a single read.
+CONNECTION_CACHE_TTL = 15
+_connection_cache = TLRUCache(maxsize=10_000, ttu=lambda _key, entry, now: now + entry[0])
+_connection_cache_lock = Lock()
+
+
+def _connection_ttl(details: dict) -> float:
+    """Seconds a connection entry may be cached: min(token lifetime left, CONNECTION_CACHE_TTL)."""
+    expiry = details.get("token_expiry")
+    if not isinstance(expiry, datetime):
+        return CONNECTION_CACHE_TTL
+    return min((expiry - datetime.utcnow()).total_seconds(), CONNECTION_CACHE_TTL)
+
+
+def invalidate_platform_connection(user_id: str, platform: str):
+    """Drop a cached connection so the next lookup reads MongoDB."""
+    with _connection_cache_lock:
+        _connection_cache.pop((user_id, platform), None)
+
+
+def _platform_connection_update(user_id: str, platform: str, platform_data: dict):
+    """Builds the (query, $set fields) pair shared by the sync and async connection savers."""
     query = _resolve_user_query(user_id)
     update_fields = {
         f"connected_platforms.{platform}.connected": True,
@@ -142,16 +227,72 @@ def save_or_update_platform_connection(user_id: str, platform: str, platform_dat
     if "accounts" in platform_data:
         update_fields[f"connected_platforms.{platform}.accounts"] = platform_data["accounts"]
 
+    return query, update_fields
+
+
+def save_or_update_platform_connection(user_id: str, platform: str, platform_data: dict):
+    """
+    Stores access tokens, expiry, IDs, and other platform details
+    inside connected_platforms.<platform>.
+    """
+    query, update_fields = _platform_connection_update(user_id, platform, platform_data)
     try:
         result = users_collection.update_one(query, {"$set": update_fields}, upsert=True)
         logger.info(f"[DB][Platform] Updated {platform} for {user_id} (matched={result.matched_count})")
     except Exception as e:
         logger.error(f"[DB][Platform] save_or_update_platform_connection failed: {e}", exc_info=True)
+    finally:
+        invalidate_platform_connection(user_id, platform)
+
+
+async def save_or_update_platform_connection_async(user_id: str, platform: str, platform_data: dict):
+    """Motor variant of save_or_update_platform_connection for async routes (single upsert)."""
+    query, update_fields = _platform_connection_update(user_id, platform, platform_data)
+    try:
+        result = await async_db["users"].update_one(query, {"$set": update_fields}, upsert=True)
+        logger.info(f"[DB][Platform] Updated {platform} for {user_id} (matched={result.matched_count})")
+    except Exception as e:
+        logger.error(f"[DB][Platform] save_or_update_platform_connection_async failed: {e}", exc_info=True)
+    finally:
+        invalidate_platform_connection(user_id, platform)
+
+
+async def save_sync_watermarks_async(user_id: str, platform: str, watermarks: dict):
+    """Record per-resource incremental sync watermarks as connected_platforms.<platform>.last_sync_<resource>."""
+    query = _resolve_user_query(user_id)
+    update_fields = {
+        f"connected_platforms.{platform}.last_sync_{resource}": synced_at
+        for resource, synced_at in watermarks.items()
+    }
+    try:
+        await async_db["users"].update_one(query, {"$set": update_fields})
+    except Exception as e:
+        logger.error(f"[DB][Platform] save_sync_watermarks_async failed: {e}", exc_info=True)
+    finally:
+        invalidate_platform_connection(user_id, platform)
+
+
+async def clear_sync_watermarks_async(user_id: str, platform: str, resources, match: Optional[dict] = None):
+    """
+    Drop connected_platforms.<platform>.last_sync_<resource> so the next sync is a full pull.
+    `match` adds conditions the user document must meet (e.g. a different shop_url).
+    """
+    query = {**_resolve_user_query(user_id), **(match or {})}
+    try:
+        await async_db["users"].update_one(
+            query,
+            {"$unset": {f"connected_platforms.{platform}.last_sync_{resource}": "" for resource in resources}},
+        )
+    except Exception as e:
+        logger.error(f"[DB][Platform] clear_sync_watermarks_async failed: {e}", exc_info=True)
+    finally:
+        invalidate_platform_connection(user_id, platform)
 
 
 def disconnect_platform(user_id: str, platform: str):
     """Remove a platform connection and its tokens from the user document."""
     query = _resolve_user_query(user_id)
+    invalidate_platform_connection(user_id, platform)
     try:
         result = users_collection.update_one(
             query,
@@ -167,12 +308,31 @@ def disconnect_platform(user_id: str, platform: str):
         raise HTTPException(status_code=500, detail="Database error disconnecting platform.")
 
 
+def get_cached_platform_connection(user_id: str, platform: str):
+    """Copy of the cached connection details, or None on a miss (never touches MongoDB)."""
+    with _connection_cache_lock:
+        entry = _connection_cache.get((user_id, platform))
+    return dict(entry[1]) if entry else None
+
+
 def get_platform_connection_details(user_id: str, platform: str):
-    """Retrieve specific platform connection details."""
+    """Retrieve specific platform connection details (cached, see CONNECTION_CACHE_TTL)."""
+    cached = get_cached_platform_connection(user_id, platform)
+    if cached:
+        return cached
+
+    key = (user_id, platform)
     query = _resolve_user_query(user_id)
     try:
         user_doc = users_collection.find_one(query, {f"connected_platforms.{platform}": 1})
-        return user_doc.get("connected_platforms", {}).get(platform) if user_doc else None
+        details = user_doc.get("connected_platforms", {}).get(platform) if user_doc else None
+        if details:
+            ttl = _connection_ttl(details)
+            if ttl > 0:
+                with _connection_cache_lock:
+                    _connection_cache[key] = (ttl, details)
+            return dict(details)
+        return details
     except Exception as e:
         logger.error(f"[DB][Platform] get_platform_connection_details failed: {e}", exc_info=True)
         return None
@@ -181,70 +341,116 @@ def get_platform_connection_details(user_id: str, platform: str):
 # ============================================================
 # 📊 ITEM STORAGE (Campaigns / Adsets / Ads)
 # ============================================================
-def save_items(collection_name: str, ad_account_id: str, items_data: list, platform: str):
+def _log_bulk_write_error(label: str, error: BulkWriteError) -> dict:
+    """Log an unordered bulk_write's partial outcome and return its result counters."""
+    details = error.details
+    write_errors = details.get("writeErrors", [])
+    logger.error(
+        f"{label} Bulk write partially failed: matched={details.get('nMatched', 0)}, "
+        f"upserted={details.get('nUpserted', 0)}, errors={len(write_errors)}; "
+        f"first error: {write_errors[0].get('errmsg') if write_errors else None}"
+    )
+    return details
+
+
+BULK_WRITE_CHUNK = 1000  # Upserts per bulk_write command
+def save_items(collection_name: str, ad_account_id: str, items_data: Iterable[dict], platform: str):
     """
     Generic function to save items (campaign/adset/ad).
     Adds safe ID extraction and skips invalid records.
+    Accepts any iterable (list, map, generator); upserts are built lazily and
+    sent in BULK_WRITE_CHUNK-sized bulk_write batches, so no full op list is held.
     """
-    if not items_data:
-        logger.info(f"[DB][Items] No {collection_name} to save for {platform}")
-        return
-
     collection = db[collection_name]
-    saved_count = 0
+    now = datetime.utcnow()
+    seen = 0
+
+    def upserts():
+        nonlocal seen
+        for item in items_data:
+            seen += 1
+            # 1️⃣ Try to extract an identifier safely
+            doc_id = (
+                item.get("id")
+                or item.get("campaign_id")
+                or item.get("ad_group_id")
+                or item.get("resourceName")
+            )
 
-    for item in items_data:
-        # 1️⃣ Try to extract an identifier safely
-        doc_id = (
-            item.get("id")
-            or item.get("campaign_id")
-            or item.get("ad_group_id")
-            or item.get("resourceName")
-        )
+            if not doc_id:
+                logger.warning(f"[DB][Items] Skipping {collection_name} record without ID: {item}")
+                continue
 
-        if not doc_id:
-            logger.warning(f"[DB][Items] Skipping {collection_name} record without ID: {item}")
-            continue
+            # 2️⃣ Add platform and ad_account metadata
+            item["platform"] = platform
+            item["ad_account_id"] = ad_account_id
+            item["last_updated"] = now
 
-        # 2️⃣ Add platform and ad_account metadata
-        item["platform"] = platform
-        item["ad_account_id"] = ad_account_id
-        item["last_updated"] = datetime.utcnow()
+            # 3️⃣ Queue the upsert
+            yield UpdateOne({"id": doc_id, "platform": platform}, {"$set": item}, upsert=True)
 
-        # 3️⃣ Upsert safely
-        try:
-            collection.update_one(
-                {"id": doc_id, "platform": platform},
-                {"$set": item},
-                upsert=True
-            )
-            saved_count += 1
-        except Exception as e:
-            logger.error(f"[DB][Items] Failed to upsert {collection_name} record: {e}", exc_info=True)
+    ops = upserts()
+    saved_count = 0
+    try:
+        # Distinct upsert keys: unordered lets one bad op fail without aborting the batch.
+        # Fixed-size chunks keep each command well under the 16MB/48MB wire limits.
+        while batch := list(islice(ops, BULK_WRITE_CHUNK)):
+            try:
+                result = collection.bulk_write(batch, ordered=False)
+                saved_count += result.upserted_count + result.matched_count
+            except BulkWriteError as e:
+                # The rest of the chunk was applied; count it and carry on with the next chunk
+                details = _log_bulk_write_error(f"[DB][Items] {collection_name}", e)
+                saved_count += details.get("nUpserted", 0) + details.get("nMatched", 0)
+    except Exception as e:
+        logger.error(f"[DB][Items] Failed to upsert {collection_name} records after {saved_count}: {e}", exc_info=True)
+        return
 
-    logger.info(f"[DB][Items] Saved {saved_count}/{len(items_data)} {collection_name} records for {platform}:{ad_account_id}")
+    if not seen:
+        logger.info(f"[DB][Items] No {collection_name} to save for {platform}")
+    elif saved_count:
+        logger.info(f"[DB][Items] Saved {saved_count}/{seen} {collection_name} records for {platform}:{ad_account_id}")
 
 
 
 # ============================================================
 # 📈 INSIGHTS (Meta / Google Daily)
 # ============================================================
-def _bulk_write(collection, records, platform, user_id, ad_account_id, id_field: str):
+# Per-level (id, date_start) extractors for Meta insight rows, built once.
+# itemgetter pulls both keys in a single C call instead of two dict.get()s.
+_META_CAMPAIGN_KEY = itemgetter("campaign_id", "date_start")
+_META_ADSET_KEY = itemgetter("adset_id", "date_start")
+_META_AD_KEY = itemgetter("ad_id", "date_start")
+
+
+def _bulk_write(collection, records, platform, user_id, ad_account_id, id_field: str, key_getter=None):
     """Helper to bulk upsert insight records."""
+    def lenient_key(record):
+        return record.get(id_field), record.get("date_start") or record.get("date")
+
+    key_getter = key_getter or lenient_key
+    owner = {"user_id": user_id, "ad_account_id": ad_account_id, "platform": platform}
     bulk_ops = []
     for record in records:
-        date_field = record.get("date_start") or record.get("date")
+        try:
+            item_id, date_field = key_getter(record)
+        except KeyError:
+            # Sparse row missing a key: fall back to lenient lookups
+            item_id, date_field = lenient_key(record)
         if not date_field:
             continue
-        filter_query = {id_field: record.get(id_field), "date_start": date_field, "platform": platform}
-        update_doc = {"$set": {**record, "user_id": user_id, "ad_account_id": ad_account_id, "platform": platform}}
+        filter_query = {id_field: item_id, "date_start": date_field, "platform": platform}
+        update_doc = {"$set": {**record, **owner}}
         bulk_ops.append(UpdateOne(filter_query, update_doc, upsert=True))
     if not bulk_ops:
         return 0
     try:
-        result = collection.bulk_write(bulk_ops)
+        result = collection.bulk_write(bulk_ops, ordered=False)
         logger.info(f"[DB][Insights] Bulk upsert → matched={result.matched_count}, upserted={result.upserted_count}")
         return result.upserted_count + result.modified_count
+    except BulkWriteError as e:
+        details = _log_bulk_write_error("[DB][Insights]", e)
+        return details.get("nUpserted", 0) + details.get("nModified", 0)
     except Exception as e:
         logger.error(f"[DB][Insights] Bulk write failed: {e}", exc_info=True)
         return 0
@@ -252,13 +458,13 @@ def _bulk_write(collection, records, platform, user_id, ad_account_id, id_field:
 
 # Meta insights
 def save_daily_insights(user_id: str, ad_account_id: str, insights_data: list):
-    return _bulk_write(meta_daily_insights_collection, insights_data, "meta", user_id, ad_account_id, "adset_id")
+    return _bulk_write(meta_daily_insights_collection, insights_data, "meta", user_id, ad_account_id, "adset_id", _META_ADSET_KEY)
 
 def save_daily_ad_insights(user_id: str, ad_account_id: str, insights_data: list):
-    return _bulk_write(meta_daily_ad_insights_collection, insights_data, "meta", user_id, ad_account_id, "ad_id")
+    return _bulk_write(meta_daily_ad_insights_collection, insights_data, "meta", user_id, ad_account_id, "ad_id", _META_AD_KEY)
 
 def save_daily_campaign_insights(user_id: str, ad_account_id: str, insights_data: list):
-    return _bulk_write(meta_daily_campaign_insights_collection, insights_data, "meta", user_id, ad_account_id, "campaign_id")
+    return _bulk_write(meta_daily_campaign_insights_collection, insights_data, "meta", user_id, ad_account_id, "campaign_id", _META_CAMPAIGN_KEY)
 
 # Google insights
 def save_google_daily_insights(user_id: str, ad_account_id: str, insights_data: list):
@@ -281,6 +487,7 @@ def save_shopify_user_token(user_id: str, access_token: str, shop_url: str):
             }},
             upsert=True
         )
+        invalidate_platform_connection(user_id, "shopify")
         logger.info(f"[DB][Shopify] Token saved for user {user_id}, shop {shop_url}")
     except Exception as e:
         logger.error(f"[DB][Shopify] save_shopify_user_token failed: {e}", exc_info=True)
@@ -289,10 +496,32 @@ def save_shopify_user_token(user_id: str, access_token: str, shop_url: str):
 # ============================================================
 # 👥 DEMOGRAPHICS STORAGE
 # ============================================================
+# Graph API returns metrics as strings; store them as numbers so reads can
+# $group/$sum directly without per-document $toInt/$toDouble.
+DEMOGRAPHIC_INT_FIELDS = ("impressions", "clicks", "reach")
+DEMOGRAPHIC_FLOAT_FIELDS = ("spend",)
+
+
+def _coerce_demographic_metrics(item: dict) -> dict:
+    """Return a copy of a demographic row with numeric metric fields."""
+    row = dict(item)
+    for field in DEMOGRAPHIC_INT_FIELDS:
+        if row.get(field) is not None:
+            try:
+                row[field] = int(row[field])
+            except (TypeError, ValueError):
+                row[field] = int(float(row[field]))
+    for field in DEMOGRAPHIC_FLOAT_FIELDS:
+        if row.get(field) is not None:
+            row[field] = float(row[field])
+    return row
+
+
 def save_demographics(collection_name: str, items_data: list, platform: str, user_id: str, ad_account_id: str, id_field: str):
     """
     Bulk upsert demographic breakdowns.
     Unique Key: id_field + date_start + age + gender
+    Metric fields are cast to int/float on write.
     """
     if not items_data:
         return 0
@@ -312,7 +541,7 @@ def save_demographics(collection_name: str, items_data: list, platform: str, use
         
         update_doc = {
             "$set": {
-                **item,
+                **_coerce_demographic_metrics(item),
                 "user_id": user_id,
                 "ad_account_id": ad_account_id,
                 "platform": platform,
@@ -323,7 +552,7 @@ def save_demographics(collection_name: str, items_data: list, platform: str, use
 
     if bulk_ops:
         try:
-            result = collection.bulk_write(bulk_ops)
+            result = collection.bulk_write(bulk_ops, ordered=False)
             logger.info(f"[DB][Demographics] Saved {len(bulk_ops)} records to {collection_name}")
             return result.upserted_count + result.modified_count
         except Exception as e:
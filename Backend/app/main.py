@@ -8,9 +8,17 @@ Main FastAPI application entrypoint
 - Provides a root endpoint for quick health check
 """
 
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.utils.logger import get_logger
+from app.utils.security import JWTAuthMiddleware
+from app.utils.http_client import client as http_client, close_http_client
+from app.database.mongo_client import ensure_indexes
+from app.scheduler.job_runner import start_scheduler, shutdown_scheduler
 from app.controllers import (
     google_controller,
     meta_controller,
@@ -23,10 +31,29 @@ from app.controllers import (
 )
 
 logger = get_logger()
+
+
+# --------------------------------------------------------------------
+# 🚀 Lifespan (Startup / Shutdown)
+# --------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(ensure_indexes)
+    start_scheduler()
+    app.state.http = http_client  # one pooled keep-alive client for all outbound calls
+    logger.info(f"🚀 FastAPI backend started successfully (loop={type(asyncio.get_running_loop()).__module__}).")
+    yield
+    shutdown_scheduler()
+    await close_http_client()
+    logger.info("🛑 FastAPI backend shutting down.")
+
+
 app = FastAPI(
     title="Ads Integration Backend",
     description="Unified backend for Google, Meta, and Shopify Ads integrations.",
     version="1.0.0",
+    default_response_class=ORJSONResponse,  # orjson: faster on the large {"data": [...]} payloads
+    lifespan=lifespan,
 )
 
 # --------------------------------------------------------------------
@@ -46,6 +73,9 @@ app.add_middleware(
 )
 logger.info("✅ CORS middleware initialized.")
 
+# Verifies the Bearer JWT once per request; get_current_user_id reads the result
+app.add_middleware(JWTAuthMiddleware)
+
 # --------------------------------------------------------------------
 # 🔗 Router Registration
 # --------------------------------------------------------------------
@@ -60,19 +90,6 @@ app.include_router(admin_controller.router, prefix="/admin", tags=["Admin"]) # <
 
 logger.info("✅ All routers registered successfully.")
 
-# --------------------------------------------------------------------
-# 🚀 Startup / Shutdown Events
-# --------------------------------------------------------------------
-@app.on_event("startup")
-async def startup_event():
-    logger.info("🚀 FastAPI backend started successfully.")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("🛑 FastAPI backend shutting down.")
-
-
 # --------------------------------------------------------------------
 # 🏠 Root Endpoint
 # --------------------------------------------------------------------
@@ -81,3 +98,21 @@ async def root():
     """Root health check endpoint."""
     logger.info("Root endpoint accessed.")
     return {"message": "Welcome to Ads Integration Backend 🚀"}
+
+
+# --------------------------------------------------------------------
+# ▶️ Local / Production Entrypoint
+# --------------------------------------------------------------------
+if __name__ == "__main__":
+    import uvicorn
+
+    # I/O-bound service: uvloop + httptools (shipped with uvicorn[standard]),
+    # 2*CPU + 1 workers unless WEB_CONCURRENCY overrides it
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", 8000)),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1) + 1)),
+    )
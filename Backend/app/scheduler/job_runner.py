@@ -0,0 +1,84 @@
+"""
+Background Job Runner
+---------------------
+Runs long Graph API syncs on an APScheduler thread pool instead of Starlette
+BackgroundTasks, so they never share the API worker's event loop with
+request handling.
+
+- Each job runs its coroutine on a fresh event loop inside a pool thread
+- Jobs are keyed by id: enqueuing an id that is already queued or running is refused
+- Started/stopped from the FastAPI startup/shutdown events
+
+The scheduler and its in-memory job store live in each API worker process:
+queued jobs are lost on restart, and the same job id can still run once per
+worker at the same time.
+"""
+
+import asyncio
+from threading import Lock
+from typing import Any, Awaitable, Callable
+
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+JOB_WORKERS = 4  # Concurrent heavy syncs per API process
+
+scheduler = BackgroundScheduler(
+    executors={"default": ThreadPoolExecutor(JOB_WORKERS)},
+    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": None},
+)
+
+
+# Ids queued or running in this process. A one-off job leaves APScheduler's store
+# once dispatched, so get_job() cannot tell that it is still running.
+_active_jobs: set = set()
+_active_jobs_lock = Lock()
+
+
+def _run_coroutine_job(job_id: str, func: Callable[..., Awaitable[Any]], *args):
+    """Executes an async job to completion on this pool thread's own loop."""
+    logger.info(f"[Jobs] ▶️ {job_id} started")
+    try:
+        asyncio.run(func(*args))
+        logger.info(f"[Jobs] ✅ {job_id} finished")
+    except Exception as e:
+        logger.error(f"[Jobs] {job_id} failed: {e}", exc_info=True)
+    finally:
+        with _active_jobs_lock:
+            _active_jobs.discard(job_id)
+
+
+def enqueue_job(job_id: str, func: Callable[..., Awaitable[Any]], *args) -> bool:
+    """
+    Queue an async function to run as soon as a pool worker is free.
+    Returns False, queuing nothing, if a job with this id is already queued or running.
+    """
+    with _active_jobs_lock:
+        if job_id in _active_jobs:
+            logger.info(f"[Jobs] {job_id} already queued or running")
+            return False
+        _active_jobs.add(job_id)
+    try:
+        scheduler.add_job(_run_coroutine_job, args=(job_id, func, *args), id=job_id)
+    except Exception:
+        with _active_jobs_lock:
+            _active_jobs.discard(job_id)
+        raise
+    logger.info(f"[Jobs] Queued {job_id}")
+    return True
+
+
+def start_scheduler():
+    if not scheduler.running:
+        scheduler.start()
+        logger.info(f"[Jobs] Scheduler started with {JOB_WORKERS} workers.")
+
+
+def shutdown_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+        logger.info("[Jobs] Scheduler stopped.")
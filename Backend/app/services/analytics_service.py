@@ -4,7 +4,7 @@ import json
 import re
 from datetime import datetime
 from difflib import get_close_matches
-from pymongo import MongoClient
+from app.database.mongo_client import db
 from bson import ObjectId
 import google.generativeai as genai
 from fastapi import HTTPException
@@ -50,11 +50,7 @@ class AnalyticsService:
         except AttributeError:
             raise RuntimeError("Missing GEMINI_API_KEY in .env file")
 
-        try:
-            client = MongoClient(settings.MONGO_URI)
-            self.db = client[settings.DB_NAME]
-        except Exception as e:
-            raise RuntimeError(f"Failed to connect to MongoDB: {e}")
+        self.db = db  # Shared, tuned pool from app.database.mongo_client
 
         self.model = genai.GenerativeModel("models/gemini-2.5-flash")
         self._platform_alias_map = self._build_platform_alias_map()
@@ -274,22 +270,24 @@ USER QUESTION:
             if not actions:
                 continue
 
+            # Flatten to (action_type, raw_value) pairs in one pass; the dict
+            # shape no longer round-trips through throwaway per-action dicts.
             if isinstance(actions, dict):
-                iterable = [
-                    {"action_type": action_key, "value": action_value}
-                    for action_key, action_value in actions.items()
-                ]
+                pairs = actions.items()
             elif isinstance(actions, list):
-                iterable = actions
+                pairs = (
+                    (action.get("action_type") or action.get("type") or action.get("name"), action.get("value"))
+                    for action in actions
+                    if isinstance(action, dict)
+                )
             else:
                 continue
 
-            for action in iterable:
-                if not isinstance(action, dict):
+            for action_type, raw_value in pairs:
+                if not action_type:
                     continue
-                action_type = action.get("action_type") or action.get("type") or action.get("name")
-                action_value = self._coerce_number(action.get("value"))
-                if not action_type or action_value is None:
+                action_value = self._coerce_number(raw_value)
+                if action_value is None:
                     continue
                 action_totals[action_type] = action_totals.get(action_type, 0) + action_value
 
@@ -394,6 +392,7 @@ USER QUESTION:
         action_totals = {}
         best_row = None
         best_score = None
+        best_purchases = 0
 
         for row in results:
             spend = self._coerce_number(self._get_nested_value(row, ["spend", "total_spend", "totalSpend", "cost"]))
@@ -436,6 +435,7 @@ USER QUESTION:
             if best_score is None or score > best_score:
                 best_score = score
                 best_row = row
+                best_purchases = row_actions.get("purchase", 0)
 
         purchases = action_totals.get("purchase", 0) or totals["conversions"]
         add_to_cart = action_totals.get("add_to_cart", 0)
@@ -488,7 +488,6 @@ USER QUESTION:
                 self._get_nested_value(best_row, ["date_start", "date", "created_at"])
             )
             best_clicks = self._coerce_number(self._get_nested_value(best_row, ["clicks", "totalClicks"])) or 0
-            best_purchases = self._extract_actions(best_row).get("purchase", 0)
 
             if best_name:
                 highlight_metric = None
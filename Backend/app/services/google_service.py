@@ -1,9 +1,9 @@
 from __future__ import annotations
 from typing import List, Dict, Optional
 from datetime import datetime, timezone, timedelta
+import orjson
 import requests
 import urllib.parse
-import json
 
 from fastapi import HTTPException
 from app.utils.logger import get_logger
@@ -15,7 +15,7 @@ from app.database.mongo_client import (
     save_items,
     db,
 )
-from app.utils.security import create_state_token, decode_token
+from app.utils.security import create_state_token, decode_state_token
 from app.utils.google_api import (
     list_campaigns_for_child,
     list_accessible_customers,
@@ -24,6 +24,7 @@ from app.utils.google_api import (
     get_basic_account_info,
     get_direct_client_accounts,
     refresh_google_access_token,
+    session,
     get_campaign_insights,
     get_campaign_daily_insights,
     get_adgroup_daily_insights,
@@ -65,7 +66,7 @@ class GoogleService:
     def handle_callback(code: str, state: str) -> str:
         """Exchange code for tokens, fetch accounts, and save connection."""
         try:
-            payload = decode_token(state)
+            payload = decode_state_token(state)
             main_app_user_id = payload.get("sub")
             if not main_app_user_id:
                 raise ValueError("Missing user_id in state token")
@@ -83,10 +84,10 @@ class GoogleService:
             "grant_type": "authorization_code",
         }
         try:
-            resp = requests.post(token_url, data=data, timeout=20)
+            resp = session.post(token_url, data=data, timeout=20)
             resp.raise_for_status()
-            tokens = resp.json()
-        except requests.RequestException as e:
+            tokens = orjson.loads(resp.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             raise HTTPException(status_code=502, detail=f"Token exchange failed: {e}")
 
         access_token = tokens.get("access_token")
@@ -97,13 +98,13 @@ class GoogleService:
         # Get Google user info
         platform_user_id = None
         try:
-            ui = requests.get(
+            ui = session.get(
                 "https://www.googleapis.com/oauth2/v3/userinfo",
                 headers={"Authorization": f"Bearer {access_token}"},
                 timeout=20,
             )
             if ui.status_code == 200:
-                platform_user_id = ui.json().get("sub")
+                platform_user_id = orjson.loads(ui.content).get("sub")
         except Exception:
             logger.warning("Could not fetch Google userinfo.")
 
@@ -112,7 +113,7 @@ class GoogleService:
         try:
             acc_resp = list_accessible_customers(access_token)
             if acc_resp and acc_resp.status_code == 200:
-                resource_names = acc_resp.json().get("resourceNames", [])
+                resource_names = orjson.loads(acc_resp.content).get("resourceNames", [])
                 if resource_names:
                     detailed_accounts = get_basic_account_info(access_token, resource_names)
         except Exception as e:
@@ -231,7 +232,7 @@ class GoogleService:
             logger.error(f"[GoogleService] Campaign API failed → {resp.status_code}: {resp.text[:300]}")
             raise HTTPException(status_code=resp.status_code, detail="Failed to fetch campaigns.")
 
-        raw_data = resp.json().get("results", [])
+        raw_data = orjson.loads(resp.content).get("results", [])
         
         transformed_data = []
         for item in raw_data:
@@ -275,7 +276,7 @@ class GoogleService:
             logger.error(f"[GoogleService] AdGroup API failed → {resp.status_code if resp else 'NO RESP'}")
             raise HTTPException(status_code=resp.status_code if resp else 500, detail="Failed to fetch ad groups.")
 
-        raw_data = resp.json().get("results", [])
+        raw_data = orjson.loads(resp.content).get("results", [])
         transformed_data = []
         for item in raw_data:
             ad_group = item.get("adGroup", {})
@@ -308,7 +309,7 @@ class GoogleService:
             logger.error(f"[GoogleService] Ads API failed → {resp.status_code if resp else 'NO RESP'}")
             raise HTTPException(status_code=resp.status_code if resp else 500, detail="Failed to fetch ads.")
 
-        raw_data = resp.json().get("results", [])
+        raw_data = orjson.loads(resp.content).get("results", [])
         transformed_data = []
         for item in raw_data:
             ad = item.get("adGroupAd", {}).get("ad", {})
@@ -446,7 +447,7 @@ class GoogleService:
             raise HTTPException(status_code=500, detail="Failed to fetch daily campaign insights")
 
         try:
-            raw_data = resp.json().get("results", [])
+            raw_data = orjson.loads(resp.content).get("results", [])
         except Exception:
             raw_data = []
 
@@ -541,7 +542,7 @@ class GoogleService:
             raise HTTPException(status_code=500, detail="Google API error")
         
         try:
-            raw_data = resp.json().get("results", [])
+            raw_data = orjson.loads(resp.content).get("results", [])
         except Exception:
             raw_data = []
             
@@ -625,7 +626,7 @@ class GoogleService:
             raise HTTPException(status_code=500, detail="Google API error")
         
         try:
-            raw_data = resp.json().get("results", [])
+            raw_data = orjson.loads(resp.content).get("results", [])
         except Exception:
             raw_data = []
         
@@ -5,8 +5,12 @@ Encapsulates Meta OAuth, token exchange, and ad data retrieval logic.
 """
 
 import asyncio
-import requests
+import json
+import httpx
+import orjson
 from datetime import date
+from types import MappingProxyType
+from typing import Awaitable, Callable, Iterable, List, Literal, Optional, Tuple
 from dateutil.relativedelta import relativedelta
 from fastapi import HTTPException
 from app.config.config import settings
@@ -20,19 +24,94 @@ from app.database.mongo_client import (
     save_demographics
 )
 
-from app.utils.meta_api import generate_monthly_ranges, fetch_paginated_insights
+from app.utils.meta_api import (
+    GRAPH_HEADERS,
+    QueryParams,
+    generate_monthly_ranges,
+    fetch_paginated_insights,
+    iter_paginated_insights,
+    new_graph_client,
+)
+from app.utils.http_client import client as http_client
 from app.utils.logger import get_logger
 
 logger = get_logger()
 API_VERSION = "v20.0"
 PLATFORM_NAME = "meta"
+SAVE_BATCH_SIZE = 10000  # Rows buffered from the Graph API before each DB write
+
+# Graph API field sets (constant per level, so built once at import)
+_METRIC_FIELDS = "impressions,clicks,spend,actions"
+CAMPAIGN_INSIGHT_FIELDS = f"date_start,date_stop,campaign_id,campaign_name,{_METRIC_FIELDS}"
+ADSET_INSIGHT_FIELDS = f"date_start,date_stop,campaign_id,campaign_name,adset_id,adset_name,{_METRIC_FIELDS}"
+AD_INSIGHT_FIELDS = f"date_start,date_stop,campaign_id,campaign_name,adset_id,adset_name,ad_id,ad_name,{_METRIC_FIELDS}"
+ACCOUNT_DEMOGRAPHIC_FIELDS = "impressions,spend,clicks,reach,actions"
+DEMOGRAPHIC_INSIGHT_FIELDS = f"campaign_id,campaign_name,adset_id,adset_name,ad_id,ad_name,{ACCOUNT_DEMOGRAPHIC_FIELDS}"
+
+MetaLevel = Literal["campaign", "adset", "ad"]
+
+# Per-level dispatch table (read-only): entity edge/fields for the "recent" sync, the
+# fields the dashboard reads back, insight fields + saver for the historical
+# fetch, and the demographics collection.
+LEVEL_SPEC = MappingProxyType({
+    "campaign": {
+        "edge": "campaigns",
+        "fields": "name,status,objective",
+        "collection": "campaigns",
+        "read_fields": ("id", "name", "status", "objective"),
+        "insight_fields": CAMPAIGN_INSIGHT_FIELDS,
+        "saver": save_daily_campaign_insights,
+        "demographics_collection": "meta_demographics_campaign",
+        "id_field": "campaign_id",
+    },
+    "adset": {
+        "edge": "adsets",
+        "fields": "name,status,daily_budget,campaign_id",
+        "collection": "adsets",
+        "read_fields": ("id", "name", "status", "daily_budget", "campaign_id"),
+        "insight_fields": ADSET_INSIGHT_FIELDS,
+        "saver": save_daily_insights,
+        "demographics_collection": "meta_demographics_adset",
+        "id_field": "adset_id",
+    },
+    "ad": {
+        "edge": "ads",
+        "fields": "name,status,adset_id,creative{image_url,body}",
+        "collection": "ads",
+        "read_fields": ("id", "name", "status", "adset_id", "creative"),
+        "insight_fields": AD_INSIGHT_FIELDS,
+        "saver": save_daily_ad_insights,
+        "demographics_collection": "meta_demographics_ad",
+        "id_field": "ad_id",
+    },
+})
+
+GRAPH_TIMEOUT = 30  # Entity listings (ads with creatives) can be slower than token calls
 
 
 # ---------------------------------------------------------------------------
 # 🔐 OAuth and Token Management
 # ---------------------------------------------------------------------------
-def exchange_code_for_token(code: str) -> dict:
-    """Exchange OAuth code → short-lived → long-lived access token."""
+async def _exchange_long_lived_token(short_token: str) -> dict:
+    """Swap a short-lived token for a long-lived one."""
+    long_url = f"https://graph.facebook.com/{API_VERSION}/oauth/access_token"
+    long_params = {
+        "grant_type": "fb_exchange_token",
+        "client_id": settings.META_APP_ID,
+        "client_secret": settings.META_APP_SECRET,
+        "fb_exchange_token": short_token,
+    }
+    long_resp = await http_client.get(long_url, params=long_params)
+    long_resp.raise_for_status()
+    return orjson.loads(long_resp.content)
+
+
+async def exchange_code_for_token(code: str) -> Tuple[dict, dict]:
+    """
+    Exchange OAuth code → short-lived → long-lived access token.
+    The /me lookup only needs the short-lived token, so it runs alongside the
+    long-lived exchange. Returns (token_data, user_info).
+    """
     try:
         # Step 1: Short-lived token
         short_url = f"https://graph.facebook.com/{API_VERSION}/oauth/access_token"
@@ -42,39 +121,50 @@ def exchange_code_for_token(code: str) -> dict:
             "client_secret": settings.META_APP_SECRET,
             "code": code,
         }
-        short_resp = requests.get(short_url, params=short_params)
+        short_resp = await http_client.get(short_url, params=short_params)
         short_resp.raise_for_status()
-        short_token = short_resp.json().get("access_token")
+        short_token = orjson.loads(short_resp.content).get("access_token")
         if not short_token:
             raise ValueError("Missing short-lived token")
-
-        # Step 2: Long-lived token
-        long_url = f"https://graph.facebook.com/{API_VERSION}/oauth/access_token"
-        long_params = {
-            "grant_type": "fb_exchange_token",
-            "client_id": settings.META_APP_ID,
-            "client_secret": settings.META_APP_SECRET,
-            "fb_exchange_token": short_token,
-        }
-        long_resp = requests.get(long_url, params=long_params)
-        long_resp.raise_for_status()
-        return long_resp.json()
     except Exception as e:
         logger.exception(f"[Meta Service] Token exchange failed: {e}")
         raise HTTPException(status_code=502, detail="Meta token exchange failed.")
 
+    # Step 2: Long-lived token + user info, concurrently
+    token_data, user_info = await asyncio.gather(
+        _exchange_long_lived_token(short_token), get_user_info(short_token), return_exceptions=True
+    )
+    if isinstance(user_info, BaseException):
+        raise user_info  # already mapped to HTTPException by get_user_info
+    if isinstance(token_data, BaseException):
+        logger.error(f"[Meta Service] Token exchange failed: {token_data}")
+        raise HTTPException(status_code=502, detail="Meta token exchange failed.")
+    return token_data, user_info
+
 
-def get_user_info(access_token: str) -> dict:
+async def get_user_info(access_token: str) -> dict:
     """Retrieve user profile info from Meta Graph API."""
     try:
-        resp = requests.get(f"https://graph.facebook.com/me", params={"access_token": access_token})
+        resp = await http_client.get("https://graph.facebook.com/me", params={"access_token": access_token})
         resp.raise_for_status()
-        return resp.json()
+        return orjson.loads(resp.content)
     except Exception as e:
         logger.error(f"[Meta Service] Failed to fetch user info: {e}")
         raise HTTPException(status_code=502, detail="Failed to fetch Meta user info.")
 
 
+def _account_url(ad_account_id: str, edge: str) -> str:
+    """Graph API URL for an ad-account edge; accepts ids with or without the act_ prefix."""
+    account = ad_account_id if ad_account_id.startswith("act_") else f"act_{ad_account_id}"
+    return f"https://graph.facebook.com/{API_VERSION}/{account}/{edge}"
+
+
+def get_meta_token(user_id: str) -> Optional[str]:
+    """Return the user's Meta access token (connection details are cached in the DB layer)."""
+    token_data = get_platform_connection_details(user_id, platform=PLATFORM_NAME)
+    return (token_data or {}).get("access_token")
+
+
 def save_meta_connection(user_id: str, access_token: str, expires_in: int, platform_user_id: str):
     """Save or update the Meta connection details."""
     platform_data = {
@@ -89,82 +179,109 @@ def save_meta_connection(user_id: str, access_token: str, expires_in: int, platf
 # ---------------------------------------------------------------------------
 # 📊 Fetch Live Data (Campaigns, Adsets, Ads)
 # ---------------------------------------------------------------------------
-def fetch_and_save(endpoint: str, user_id: str, ad_account_id: str, fields: str, collection: str):
+async def fetch_and_save(endpoint: str, user_id: str, ad_account_id: str, fields: str, collection: str):
     """Generic fetch-and-save helper for campaigns, adsets, and ads."""
-    token_data = get_platform_connection_details(user_id, platform=PLATFORM_NAME)
-    if not token_data or "access_token" not in token_data:
+    access_token = await asyncio.to_thread(get_meta_token, user_id)
+    if not access_token:
         raise HTTPException(status_code=404, detail="Meta access token missing.")
 
-    access_token = token_data["access_token"]
-    account = f"act_{ad_account_id}" if not ad_account_id.startswith("act_") else ad_account_id
-    url = f"https://graph.facebook.com/{API_VERSION}/{account}/{endpoint}"
+    url = _account_url(ad_account_id, endpoint)
 
     try:
-        resp = requests.get(url, params={"access_token": access_token, "fields": fields})
+        resp = await http_client.get(
+            url,
+            params={"access_token": access_token, "fields": fields},
+            headers=GRAPH_HEADERS,
+            timeout=GRAPH_TIMEOUT,
+        )
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
         if data.get("data"):
-            save_items(collection, ad_account_id, data["data"], PLATFORM_NAME)
+            await asyncio.to_thread(save_items, collection, ad_account_id, data["data"], PLATFORM_NAME)
         return data
-    except requests.exceptions.RequestException as e:
-        error_body = e.response.text if e.response is not None else "No response body"
+    except httpx.HTTPError as e:
+        response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+        error_body = response.text if response is not None else "No response body"
         logger.error(f"[Meta] Failed to fetch {endpoint} for {ad_account_id}: {e}")
         logger.error(f"[Meta] API Error Details: {error_body}")
-        
-        detail = e.response.text if e.response else "Meta API request failed."
+
+        detail = response.text if response is not None else "Meta API request failed."
         raise HTTPException(status_code=502, detail=detail)
 
 
 # ---------------------------------------------------------------------------
 # 🕓 Historical Insights Fetch
 # ---------------------------------------------------------------------------
-async def run_historical_fetch(user_id: str, ad_account_id: str, level: str):
+async def _stream_monthly_ranges(
+    url: str,
+    monthly_ranges: List[Tuple[str, str]],
+    params_for: Callable[[str, str], QueryParams],
+    flush: Callable[[list], Awaitable[int]],
+    label: str,
+    client: Optional[httpx.AsyncClient] = None,
+) -> int:
+    """
+    Page through each monthly window and flush rows in SAVE_BATCH_SIZE batches.
+    Cursors within a month are sequential, but months are independent, so all
+    windows are queued at once; the ad account's gate in iter_paginated_insights
+    decides how many page at a time. Returns the total rows saved.
+    """
+    async def _month(i: int, since: str, until: str) -> int:
+        logger.info(f"{label}: {since}→{until}")
+        buffer = []
+        count = 0
+        async for page in iter_paginated_insights(url, params_for(since, until), client):
+            buffer.extend(page)
+            if len(buffer) >= SAVE_BATCH_SIZE:
+                count += await flush(buffer)
+                buffer = []
+        if buffer:
+            count += await flush(buffer)
+        if count:
+            logger.info(f"{label}: saved {count} records [{i+1}/{len(monthly_ranges)}]")
+        return count
+
+    counts = await asyncio.gather(*(_month(i, since, until) for i, (since, until) in enumerate(monthly_ranges)))
+    return sum(counts)
+
+
+async def run_historical_fetch(user_id: str, ad_account_id: str, level: str, client: Optional[httpx.AsyncClient] = None):
     """Fetch 2.5 years of historical insights (campaign/adset/ad) in background."""
-    token_data = get_platform_connection_details(user_id, platform=PLATFORM_NAME)
-    if not token_data or "access_token" not in token_data:
+    access_token = get_meta_token(user_id)
+    if not access_token:
         logger.error(f"[Meta Historical] Missing token for user {user_id}")
         return
 
-    access_token = token_data["access_token"]
-    account = f"act_{ad_account_id}" if not ad_account_id.startswith("act_") else ad_account_id
-    insights_url = f"https://graph.facebook.com/{API_VERSION}/{account}/insights"
-
-    # Determine field set and storage function
-    if level == "ad":
-        fields = "date_start,date_stop,campaign_id,campaign_name,adset_id,adset_name,ad_id,ad_name,impressions,clicks,spend,actions"
-        saver = save_daily_ad_insights
-    elif level == "campaign":
-        fields = "date_start,date_stop,campaign_id,campaign_name,impressions,clicks,spend,actions"
-        saver = save_daily_campaign_insights
-    else:
-        fields = "date_start,date_stop,campaign_id,campaign_name,adset_id,adset_name,impressions,clicks,spend,actions"
-        saver = save_daily_insights
+    insights_url = _account_url(ad_account_id, "insights")
+
+    # Determine field set and storage function (unknown levels fall back to adset)
+    spec = LEVEL_SPEC.get(level, LEVEL_SPEC["adset"])
+    fields = spec["insight_fields"]
+    saver = spec["saver"]
 
     # Generate monthly ranges
     end_date = date.today()
     start_date = end_date - relativedelta(years=2, months=6)
     monthly_ranges = generate_monthly_ranges(start_date, end_date)
-    total_saved = 0
 
-    base_params = {
-        "access_token": access_token,
-        "level": level,
-        "time_increment": 1,
-        "fields": fields,
-        "limit": 500,
-    }
+    # Built once per level; each month only appends its own time_range pair
+    base_params = (
+        ("access_token", access_token),
+        ("level", level),
+        ("time_increment", 1),
+        ("fields", fields),
+        ("limit", 500),
+    )
+
+    def params_for(since: str, until: str) -> QueryParams:
+        return [*base_params, ("time_range", json.dumps({"since": since, "until": until}))]
 
-    for i, (since, until) in enumerate(monthly_ranges):
-        time_range = {"since": since, "until": until}
-        params = base_params.copy()
-        params["time_range"] = str(time_range).replace("'", '"')
+    async def flush(rows: list) -> int:
+        return await asyncio.to_thread(saver, user_id, ad_account_id, rows)
 
-        logger.info(f"[Meta Historical] {level} data for {ad_account_id}: {since}→{until}")
-        insights = await fetch_paginated_insights(insights_url, params)
-        if insights:
-            count = saver(user_id, ad_account_id, insights)
-            total_saved += count
-            logger.info(f"Saved {count} {level} records for {ad_account_id} [{i+1}/{len(monthly_ranges)}]")
+    total_saved = await _stream_monthly_ranges(
+        insights_url, monthly_ranges, params_for, flush, f"[Meta Historical] {level} data for {ad_account_id}", client
+    )
 
     logger.info(f"[Meta Historical] Done. {total_saved} total {level} records saved for {ad_account_id}.")
 
@@ -174,14 +291,11 @@ async def get_demographics_data(user_id: str, ad_account_id: str, date_preset: s
     Fetches age and gender breakdown for the entire ad account.
     """
     # 1. Get Token
-    token_data = get_platform_connection_details(user_id, platform=PLATFORM_NAME)
-    if not token_data or "access_token" not in token_data:
+    access_token = get_meta_token(user_id)
+    if not access_token:
         raise HTTPException(status_code=404, detail="Meta access token missing.")
 
-    access_token = token_data["access_token"]
-    account = f"act_{ad_account_id}" if not ad_account_id.startswith("act_") else ad_account_id
-    
-    url = f"https://graph.facebook.com/{API_VERSION}/{account}/insights"
+    url = _account_url(ad_account_id, "insights")
 
     # 2. Prepare Parameters
     # We use level='account' to get the aggregate for the whole account, 
@@ -191,7 +305,7 @@ async def get_demographics_data(user_id: str, ad_account_id: str, date_preset: s
         "level": "account", 
         "date_preset": date_preset,
         "breakdowns": "age,gender", 
-        "fields": "impressions,spend,clicks,reach,actions",
+        "fields": ACCOUNT_DEMOGRAPHIC_FIELDS,
         "limit": 500
     }
 
@@ -204,29 +318,21 @@ async def get_demographics_data(user_id: str, ad_account_id: str, date_preset: s
         logger.error(f"[Meta Demographics] Failed: {e}")
         raise HTTPException(status_code=502, detail="Failed to fetch demographic data.")
     
-async def run_historical_demographics_fetch(user_id: str, ad_account_id: str, level: str):
+async def run_historical_demographics_fetch(user_id: str, ad_account_id: str, level: str, client: Optional[httpx.AsyncClient] = None):
     """
     Fetches historical AGE & GENDER breakdown.
     This runs parallel to the main sync to keep operations clean.
     """
-    token_data = get_platform_connection_details(user_id, platform=PLATFORM_NAME)
-    if not token_data or "access_token" not in token_data:
+    access_token = get_meta_token(user_id)
+    if not access_token:
         return
 
-    access_token = token_data["access_token"]
-    account = f"act_{ad_account_id}" if not ad_account_id.startswith("act_") else ad_account_id
-    url = f"https://graph.facebook.com/{API_VERSION}/{account}/insights"
-
-    # Determine collection and ID field
-    if level == "campaign":
-        collection = "meta_demographics_campaign"
-        id_field = "campaign_id"
-    elif level == "adset":
-        collection = "meta_demographics_adset"
-        id_field = "adset_id"
-    else:
-        collection = "meta_demographics_ad"
-        id_field = "ad_id"
+    url = _account_url(ad_account_id, "insights")
+
+    # Determine collection and ID field (unknown levels fall back to ad)
+    spec = LEVEL_SPEC.get(level, LEVEL_SPEC["ad"])
+    collection = spec["demographics_collection"]
+    id_field = spec["id_field"]
 
     # Generate monthly ranges (same as main fetch)
     end_date = date.today()
@@ -238,20 +344,41 @@ async def run_historical_demographics_fetch(user_id: str, ad_account_id: str, le
         "level": level,
         "time_increment": "monthly", # Aggregate by month to reduce row count (daily demographics is too heavy)
         "breakdowns": "age,gender",
-        "fields": "campaign_id,campaign_name,adset_id,adset_name,ad_id,ad_name,impressions,spend,clicks,reach,actions",
+        "fields": DEMOGRAPHIC_INSIGHT_FIELDS,
         "limit": 500,
     }
 
-    total = 0
-    for i, (since, until) in enumerate(monthly_ranges):
-        time_range = {"since": since, "until": until}
-        current_params = {**params, "time_range": str(time_range).replace("'", '"')}
-        
-        logger.info(f"[Meta Demographics] Fetching {level} {since} -> {until}")
-        data = await fetch_paginated_insights(url, current_params)
-        
-        if data:
-            count = save_demographics(collection, data, PLATFORM_NAME, user_id, ad_account_id, id_field)
-            total += count
-
-    logger.info(f"[Meta Demographics] Finished. Saved {total} records.")
\ No newline at end of file
+    def params_for(since: str, until: str) -> QueryParams:
+        return {**params, "time_range": json.dumps({"since": since, "until": until})}
+
+    async def flush(rows: list) -> int:
+        return await asyncio.to_thread(
+            save_demographics, collection, rows, PLATFORM_NAME, user_id, ad_account_id, id_field
+        )
+
+    total = await _stream_monthly_ranges(
+        url, monthly_ranges, params_for, flush, f"[Meta Demographics] Fetching {level}", client
+    )
+
+    logger.info(f"[Meta Demographics] Finished. Saved {total} records.")
+
+# ---------------------------------------------------------------------------
+# 🧵 Historical Sync Fan-out
+# ---------------------------------------------------------------------------
+async def run_historical_sync(user_id: str, ad_account_id: str, levels: Iterable[str]):
+    """
+    Run the main + demographics historical fetches for each level as one task
+    group. Every month window of every level shares the ad account's
+    ACCOUNT_CONCURRENCY gate and this run's one Graph client.
+    """
+    async def _run(job, level: str, client: httpx.AsyncClient):
+        try:
+            await job(user_id, ad_account_id, level, client)
+        except Exception as e:
+            logger.error(f"[Meta Historical] {job.__name__} failed for {level}: {e}", exc_info=True)
+
+    jobs = (run_historical_fetch, run_historical_demographics_fetch)
+    # Runs on a job-pool thread's own event loop, where the shared client cannot be used
+    async with new_graph_client() as client:
+        await asyncio.gather(*(_run(job, level, client) for level in levels for job in jobs))
+    logger.info(f"[Meta Historical] ✅ Sync complete for {ad_account_id}")
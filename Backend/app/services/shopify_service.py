@@ -1,81 +1,190 @@
 from fastapi import HTTPException
-import requests, hmac, hashlib, time, urllib.parse
-from typing import Dict, Any, Optional, List
+import asyncio, hmac, hashlib, time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+import httpx
+import orjson
+from pymongo import UpdateOne
+from typing import AsyncIterator, Dict, Any, Mapping, Optional, List
 from datetime import datetime, date
 from collections import defaultdict
 from app.utils.logger import get_logger
 from app.database.mongo_client import (
     save_or_update_platform_connection,
     get_platform_connection_details,
+    get_cached_platform_connection,
     save_items,
-    db
+    db,
+    async_db,
 )
 from app.utils.shopify_api import (
     get_all_orders, get_all_products, get_all_customers,
-    get_all_collections, get_inventory_levels
+    get_all_collections, get_inventory_levels,
+    iter_order_pages, iter_product_pages, iter_customer_pages,
+    INCREMENTAL_RESOURCES,
+    warm_connection,
+    iter_collection_pages, iter_inventory_pages,
+    iter_bulk_orders, iter_bulk_products
 )
 from app.utils.security import decode_token
+from app.utils.http_client import client as http_client
 from app.config.config import settings
 
 logger = get_logger()
 
+# Token exchange: fail fast on connect, retry only attempts Shopify never processed
+TOKEN_EXCHANGE_TIMEOUT = httpx.Timeout(10.0, connect=3.05)
+TOKEN_EXCHANGE_RETRIES = 3
+TOKEN_EXCHANGE_BACKOFF = 0.2
+# Only the one-time code varies per callback
+_TOKEN_EXCHANGE_CREDENTIALS = {
+    "client_id": settings.SHOPIFY_CLIENT_ID,
+    "client_secret": settings.SHOPIFY_CLIENT_SECRET,
+}
+_TOKEN_EXCHANGE_HEADERS = {"Accept": "application/json"}
 
-def verify_shopify_hmac(query_dict: dict, secret: str) -> bool:
-    """Verify HMAC signature in Shopify callback query parameters."""
-    q = [(k, v) for k, v in query_dict.items() if k not in ("hmac", "signature")]
-    q.sort(key=lambda kv: kv[0])
-    msg = urllib.parse.urlencode(q, doseq=True)
-    digest = hmac.new(secret.encode(), msg.encode(), hashlib.sha256).hexdigest()
-    return hmac.compare_digest(digest, query_dict.get("hmac", ""))
+BULK_SAVE_BATCH = 1000  # Records per save_items call while draining a bulk export
+DAILY_ORDER_IDS = 100  # Order IDs kept per daily insight for reference
 
+# Sync/bulk writes get their own bounded threads, so a slow Mongo under a large
+# Shopify import cannot drain the default executor that request handlers share
+DB_WRITE_WORKERS = 16
+_db_write_executor = ThreadPoolExecutor(max_workers=DB_WRITE_WORKERS, thread_name_prefix="shopify-db")
 
-def exchange_code_for_token(shop: str, code: str) -> str:
+
+async def _run_db_write(func, *args):
+    """Run a blocking Mongo write on the dedicated Shopify write pool."""
+    return await asyncio.get_running_loop().run_in_executor(_db_write_executor, partial(func, *args))
+
+
+# Shopify's signing escapes: keys get %, & and =; values only % and &
+_HMAC_KEY_ESCAPE = str.maketrans({"%": "%25", "&": "%26", "=": "%3D"})
+_HMAC_VALUE_ESCAPE = str.maketrans({"%": "%25", "&": "%26"})
+HMAC_HEX_LEN = 2 * hashlib.sha256().digest_size  # 64
+_HMAC_UNSIGNED_PARAMS = frozenset(("hmac", "signature"))
+
+
+@lru_cache(maxsize=4)
+def _hmac_template(secret: str) -> "hmac.HMAC":
+    """
+    Keyed HMAC-SHA256 with the padded key already absorbed; copy() per message.
+    Cheaper than the one-shot hmac.digest(), which re-derives both key pads on every call.
+    """
+    return hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+
+def verify_shopify_hmac(params: Mapping[str, str], received_hmac: str, secret: str) -> bool:
+    """
+    Verify HMAC signature in Shopify callback query parameters.
+    Both sides are raw 32-byte digests compared with hmac.compare_digest; never compare
+    signatures, tokens or state values with ==/!= (CWE-208).
+    Reads `params` (e.g. request.query_params) in place; nothing is copied or mutated.
+    Malformed signatures (not 64 hex chars) are rejected before any hashing.
+    """
+    if len(received_hmac) != HMAC_HEX_LEN:
+        logger.warning("[Shopify HMAC] Rejected signature of length %d", len(received_hmac))
+        return False
+    try:
+        received = bytes.fromhex(received_hmac)
+    except ValueError:
+        logger.warning("[Shopify HMAC] Rejected non-hex signature")
+        return False
+
+    msg = "&".join(
+        f"{k.translate(_HMAC_KEY_ESCAPE)}={params[k].translate(_HMAC_VALUE_ESCAPE)}"
+        for k in sorted(params)
+        if k not in _HMAC_UNSIGNED_PARAMS
+    )
+    mac = _hmac_template(secret).copy()
+    mac.update(msg.encode())
+    return hmac.compare_digest(mac.digest(), received)
+
+
+async def exchange_code_for_token(shop: str, code: str) -> str:
     """Exchange authorization code for permanent access token."""
     try:
-        resp = requests.post(
-            f"https://{shop}/admin/oauth/access_token",
-            json={
-                "client_id": settings.SHOPIFY_CLIENT_ID,
-                "client_secret": settings.SHOPIFY_CLIENT_SECRET,
-                "code": code,
-            },
-            timeout=15
-        )
+        for attempt in range(TOKEN_EXCHANGE_RETRIES + 1):
+            try:
+                resp = await http_client.post(
+                    f"https://{shop}/admin/oauth/access_token",
+                    json={**_TOKEN_EXCHANGE_CREDENTIALS, "code": code},
+                    headers=_TOKEN_EXCHANGE_HEADERS,
+                    timeout=TOKEN_EXCHANGE_TIMEOUT,
+                )
+            except httpx.ConnectError:
+                # Never reached Shopify, so the one-time code is still unused
+                if attempt == TOKEN_EXCHANGE_RETRIES:
+                    raise
+            else:
+                # 429 is rejected before the code is consumed; 5xx may not be, so no retry
+                if resp.status_code != 429 or attempt == TOKEN_EXCHANGE_RETRIES:
+                    break
+            await asyncio.sleep(TOKEN_EXCHANGE_BACKOFF * 2 ** attempt)
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
         access_token = data.get("access_token")
         if not access_token:
             raise ValueError("Missing access_token")
-        logger.info(f"[Shopify Service] Token retrieved for {shop}")
+        logger.info("[Shopify Service] Token retrieved for %s", shop)
         return access_token
     except Exception as e:
-        logger.exception(f"[Shopify Service] Token exchange failed: {e}")
+        logger.exception("[Shopify Service] Token exchange failed: %s", e)
         raise HTTPException(status_code=500, detail="Token exchange failed")
 
 
-def get_connection_or_403(user_id: str, current_user_id: str):
-    """Retrieve and validate Shopify connection for the given user."""
-    if user_id != current_user_id:
-        raise HTTPException(status_code=403, detail="Forbidden")
+_warmup_tasks: set = set()  # Strong refs so fire-and-forget warmups aren't garbage-collected
+
+
+async def _warm_after_install(user_id: str, shop: str, access_token: str):
+    """Prime the connection cache and the shop's HTTP/2 connection for the first data request."""
+    results = await asyncio.gather(
+        asyncio.to_thread(get_platform_connection_details, user_id, "shopify"),
+        warm_connection(shop, access_token),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("[Shopify Warmup] %s for %s: %s", type(result).__name__, shop, result)
+
 
-    details = get_platform_connection_details(user_id, "shopify")
+def schedule_warmup(user_id: str, shop: str, access_token: str) -> None:
+    """Run _warm_after_install in the background while the browser follows the redirect."""
+    task = asyncio.create_task(_warm_after_install(user_id, shop, access_token))
+    _warmup_tasks.add(task)
+    task.add_done_callback(_warmup_tasks.discard)
+
+
+def _require_complete(details: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """404 unless the connection carries both an access token and a shop URL."""
     if not details or not details.get("access_token") or not details.get("shop_url"):
         raise HTTPException(status_code=404, detail="Shopify connection missing or incomplete.")
     return details
 
 
-def transform_orders_to_daily_insights(orders: List[Dict], user_id: str, shop_url: str) -> List[Dict]:
-    """
-    Transform raw Shopify orders into daily insights format.
-    Similar to how Google/Meta store daily aggregated data.
-    """
-    daily_data = defaultdict(lambda: {
+def get_connection(user_id: str):
+    """Retrieve and validate Shopify connection (callers check ownership first)."""
+    return _require_complete(get_platform_connection_details(user_id, "shopify"))
+
+
+async def get_connection_async(user_id: str):
+    """get_connection for async routes: a cache hit is a dict lookup, only a miss takes a thread."""
+    details = get_cached_platform_connection(user_id, "shopify")
+    if details is None:
+        return await asyncio.to_thread(get_connection, user_id)
+    return _require_complete(details)
+
+
+def _new_daily_bucket() -> Dict[str, Any]:
+    return {
         'total_revenue': 0.0,
         'order_count': 0,
         'total_items': 0,
         'orders': []
-    })
-    
+    }
+
+
+def accumulate_daily_orders(daily_data: Dict[str, Dict[str, Any]], orders: List[Dict]) -> None:
+    """Fold a batch of raw orders into per-day totals (call once per page when streaming)."""
     for order in orders:
         try:
             # Parse date from created_at
@@ -85,7 +194,7 @@ def transform_orders_to_daily_insights(orders: List[Dict], user_id: str, shop_ur
             elif isinstance(created_at, datetime):
                 order_date = created_at.date()
             else:
-                logger.warning(f"[Shopify Transform] Skipping order with invalid date: {order.get('id')}")
+                logger.warning("[Shopify Transform] Skipping order with invalid date: %s", order.get('id'))
                 continue
             
             date_str = order_date.strftime('%Y-%m-%d')
@@ -98,13 +207,16 @@ def transform_orders_to_daily_insights(orders: List[Dict], user_id: str, shop_ur
             daily_data[date_str]['total_revenue'] += total_price
             daily_data[date_str]['order_count'] += 1
             daily_data[date_str]['total_items'] += line_items_count
-            daily_data[date_str]['orders'].append(order.get('id'))
+            if len(daily_data[date_str]['orders']) < DAILY_ORDER_IDS:
+                daily_data[date_str]['orders'].append(order.get('id'))
             
         except Exception as e:
-            logger.error(f"[Shopify Transform] Error processing order {order.get('id')}: {e}")
+            logger.error("[Shopify Transform] Error processing order %s: %s", order.get('id'), e)
             continue
-    
-    # Convert to list of daily insight documents
+
+
+def daily_insight_documents(daily_data: Dict[str, Dict[str, Any]], user_id: str, shop_url: str) -> List[Dict]:
+    """Turn accumulated per-day totals into shopify_daily_insights documents."""
     insights = []
     for date_str, data in daily_data.items():
         insight = {
@@ -117,13 +229,23 @@ def transform_orders_to_daily_insights(orders: List[Dict], user_id: str, shop_ur
             'order_count': data['order_count'],
             'total_items': data['total_items'],
             'avg_order_value': data['total_revenue'] / data['order_count'] if data['order_count'] > 0 else 0,
-            'order_ids': data['orders'][:100],  # Store first 100 order IDs for reference
+            'order_ids': data['orders'],  # First DAILY_ORDER_IDS order IDs for reference
             'created_at': datetime.utcnow().isoformat(),
             'updated_at': datetime.utcnow().isoformat()
         }
         insights.append(insight)
-    
-    logger.info(f"[Shopify Transform] Created {len(insights)} daily insights from {len(orders)} orders")
+    return insights
+
+
+def transform_orders_to_daily_insights(orders: List[Dict], user_id: str, shop_url: str) -> List[Dict]:
+    """
+    Transform raw Shopify orders into daily insights format.
+    Similar to how Google/Meta store daily aggregated data.
+    """
+    daily_data = defaultdict(_new_daily_bucket)
+    accumulate_daily_orders(daily_data, orders)
+    insights = daily_insight_documents(daily_data, user_id, shop_url)
+    logger.info("[Shopify Transform] Created %s daily insights from %s orders", len(insights), len(orders))
     return insights
 
 
@@ -133,12 +255,13 @@ def save_daily_insights(insights: List[Dict], user_id: str):
     Uses upsert to handle incremental updates.
     """
     if not insights:
-        logger.warning(f"[Shopify Daily Insights] No insights to save for user {user_id}")
+        logger.warning("[Shopify Daily Insights] No insights to save for user %s", user_id)
         return
     
     collection = db['shopify_daily_insights']
     
     try:
+        bulk_ops = []
         for insight in insights:
             # Upsert based on user_id, platform, and date
             filter_query = {
@@ -147,35 +270,39 @@ def save_daily_insights(insights: List[Dict], user_id: str):
                 'date_start': insight['date_start']
             }
             
+            # created_at may only appear in $setOnInsert, or Mongo rejects the path conflict
+            fields = {k: v for k, v in insight.items() if k != 'created_at'}
             update_doc = {
-                '$set': insight,
-                '$setOnInsert': {'created_at': datetime.utcnow().isoformat()}
+                '$set': fields,
+                '$setOnInsert': {'created_at': insight.get('created_at') or datetime.utcnow().isoformat()}
             }
             
-            collection.update_one(filter_query, update_doc, upsert=True)
+            bulk_ops.append(UpdateOne(filter_query, update_doc, upsert=True))
         
-        logger.info(f"[Shopify Daily Insights] Saved {len(insights)} daily insights for user {user_id}")
+        # One round-trip for every day in the range; days are distinct keys, so unordered
+        collection.bulk_write(bulk_ops, ordered=False)
+        logger.info("[Shopify Daily Insights] Saved %s daily insights for user %s", len(insights), user_id)
         
     except Exception as e:
-        logger.exception(f"[Shopify Daily Insights] Failed to save: {e}")
+        logger.exception("[Shopify Daily Insights] Failed to save: %s", e)
         raise
 
 
-def fetch_and_save_paginated(
+async def fetch_and_save_paginated(
     resource_type: str,
     user_id: str,
     page: int = 1,
     limit: int = 50,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
 ) -> Dict[str, Any]:
     """
     Fetch a resource type with pagination from MongoDB (NOT from Shopify API).
-    This reads from cached data in MongoDB.
+    This reads from cached data in MongoDB via Motor; count and page run concurrently.
     """
     try:
         collection_name = f"shopify_{resource_type}"
-        collection = db[collection_name]
+        collection = async_db[collection_name]
         
         # Build query - ALWAYS include platform for consistency
         query = {
@@ -187,26 +314,26 @@ def fetch_and_save_paginated(
         if start_date or end_date:
             date_query = {}
             if start_date:
-                date_query["$gte"] = start_date
+                date_query["$gte"] = start_date.isoformat()
             if end_date:
-                date_query["$lte"] = end_date
+                date_query["$lte"] = end_date.isoformat()
             query["created_at"] = date_query
         
-        # Get total count
-        total = collection.count_documents(query)
-        
-        logger.info(f"[Shopify {resource_type.title()}] Found {total} total items for user {user_id}")
-        
-        # Paginate
+        # Total count and the requested page, in parallel
         skip = (page - 1) * limit
         cursor = collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
-        data = list(cursor)
+        total, data = await asyncio.gather(
+            collection.count_documents(query),
+            cursor.to_list(length=limit),
+        )
+        
+        logger.info("[Shopify %s] Found %s total items for user %s", resource_type.title(), total, user_id)
         
         # Remove MongoDB _id field
         for item in data:
             item.pop("_id", None)
         
-        logger.info(f"[Shopify {resource_type.title()}] Page {page}: Returned {len(data)}/{total} items")
+        logger.info("[Shopify %s] Page %s: Returned %s/%s items", resource_type.title(), page, len(data), total)
         
         return {
             "data": data,
@@ -217,11 +344,11 @@ def fetch_and_save_paginated(
             "has_more": (skip + len(data)) < total,
         }
     except Exception as e:
-        logger.exception(f"[Shopify {resource_type.title()}] Pagination failed: {e}")
+        logger.exception("[Shopify %s] Pagination failed: %s", resource_type.title(), e)
         raise HTTPException(status_code=500, detail=f"Error fetching {resource_type}.")
 
 
-def fetch_and_save(
+async def fetch_and_save(
     resource_type: str, 
     user_id: str, 
     func, 
@@ -238,10 +365,10 @@ def fetch_and_save(
     This is for INITIAL sync or refresh - fetches ALL data from Shopify.
     """
     try:
-        data = func(shop_url, token, **kwargs)
+        data = await func(shop_url, token, **kwargs)
         
         if not data:
-            logger.warning(f"[Shopify {resource_type.title()}] No data returned from API")
+            logger.warning("[Shopify %s] No data returned from API", resource_type.title())
             return {
                 "data": [],
                 "count": 0,
@@ -249,14 +376,14 @@ def fetch_and_save(
             }
         
         # Save raw data
-        save_items(f"shopify_{resource_type}", user_id, data, "shopify")
-        logger.info(f"[Shopify {resource_type.title()}] Saved {len(data)} raw items for {user_id}")
+        await _run_db_write(save_items, f"shopify_{resource_type}", user_id, data, "shopify")
+        logger.info("[Shopify %s] Saved %s raw items for %s", resource_type.title(), len(data), user_id)
         
         # For orders, ALSO create daily insights
         if resource_type == "orders":
             insights = transform_orders_to_daily_insights(data, user_id, shop_url)
-            save_daily_insights(insights, user_id)
-            logger.info(f"[Shopify Orders] Created {len(insights)} daily insights")
+            await _run_db_write(save_daily_insights, insights, user_id)
+            logger.info("[Shopify Orders] Created %s daily insights", len(insights))
 
         return {
             "data": data,
@@ -265,5 +392,95 @@ def fetch_and_save(
         }
         
     except Exception as e:
-        logger.exception(f"[Shopify {resource_type.title()}] Failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching {resource_type}.")
\ No newline at end of file
+        logger.exception("[Shopify %s] Failed: %s", resource_type.title(), e)
+        raise HTTPException(status_code=500, detail=f"Error fetching {resource_type}.")
+
+
+def latest_updated_at(records: List[Dict]) -> Optional[str]:
+    """Newest updatedAt among the records (Shopify ISO-8601 UTC strings sort lexically)."""
+    return max((r["updatedAt"] for r in records if r.get("updatedAt")), default=None)
+
+
+async def sync_and_save(
+    resource_type: str,
+    user_id: str,
+    shop_url: str,
+    pages: AsyncIterator[List[Dict]],
+) -> Dict[str, Any]:
+    """
+    Persist a Shopify resource page by page as it downloads.
+    Only the current page is held in memory; for ORDERS the daily insights are folded
+    in per page and written once at the end.
+
+    Returns the record count and the newest updatedAt seen, which is only
+    reached once the cursor chain ran to its last page (a failed page raises).
+    """
+    daily_data = defaultdict(_new_daily_bucket) if resource_type == "orders" else None
+    total = 0
+    latest = None
+    try:
+        async for page in pages:
+            if not page:
+                continue
+            await _run_db_write(save_items, f"shopify_{resource_type}", user_id, page, "shopify")
+            total += len(page)
+            page_latest = latest_updated_at(page)
+            if page_latest and (latest is None or page_latest > latest):
+                latest = page_latest
+            if daily_data is not None:
+                accumulate_daily_orders(daily_data, page)
+        logger.info("[Shopify %s] Synced %s raw items for %s", resource_type.title(), total, user_id)
+
+        if daily_data:
+            insights = daily_insight_documents(daily_data, user_id, shop_url)
+            await _run_db_write(save_daily_insights, insights, user_id)
+            logger.info("[Shopify Orders] Created %s daily insights", len(insights))
+        return {"count": total, "latest_updated_at": latest}
+    except Exception as e:
+        logger.exception("[Shopify %s] Sync failed after %s items: %s", resource_type.title(), total, e)
+        raise HTTPException(status_code=500, detail=f"Error fetching {resource_type}.")
+
+
+async def stream_and_save(
+    resource_type: str,
+    user_id: str,
+    pages: AsyncIterator[List[Dict]],
+) -> AsyncIterator[bytes]:
+    """
+    Persist a Shopify resource page by page and yield it as NDJSON (one record per line).
+    Only the current page is held in memory, and the client receives rows as they arrive.
+    """
+    total = 0
+    try:
+        async for page in pages:
+            if not page:
+                continue
+            await _run_db_write(save_items, f"shopify_{resource_type}", user_id, page, "shopify")
+            total += len(page)
+            yield b"".join(orjson.dumps(item) + b"\n" for item in page)
+        logger.info("[Shopify %s] Streamed and saved %s items for %s", resource_type.title(), total, user_id)
+    except Exception as e:
+        # Headers are already sent: log and end the stream early
+        logger.exception("[Shopify %s] Stream failed after %s items: %s", resource_type.title(), total, e)
+
+
+async def bulk_fetch_and_save(
+    resource_type: str,
+    user_id: str,
+    records: AsyncIterator[Dict],
+) -> int:
+    """Drain a bulk-operation record stream into MongoDB in BULK_SAVE_BATCH chunks."""
+    batch: List[Dict] = []
+    total = 0
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= BULK_SAVE_BATCH:
+            await _run_db_write(save_items, f"shopify_{resource_type}", user_id, batch, "shopify")
+            total += len(batch)
+            batch = []
+    if batch:
+        await _run_db_write(save_items, f"shopify_{resource_type}", user_id, batch, "shopify")
+        total += len(batch)
+
+    logger.info("[Shopify Bulk] Saved %s %s for %s", total, resource_type, user_id)
+    return total
@@ -6,6 +6,8 @@ from app.utils.logger import get_logger
 
 logger = get_logger()
 
+PROFILE_PROJECTION = {"name": 1, "email": 1}
+
 
 class UserService:
     """
@@ -21,14 +23,14 @@ class UserService:
         try:
             connection_status = get_user_connection_status(user_id)
             if connection_status is None:
-                logger.error(f"[UserService] No connection status found for user_id={user_id}")
+                logger.error("[UserService] No connection status found for user_id=%s", user_id)
                 raise HTTPException(status_code=500, detail="Could not retrieve platform connection status.")
-            logger.info(f"[UserService] Retrieved platform connections for user_id={user_id}")
+            logger.info("[UserService] Retrieved platform connections for user_id=%s", user_id)
             return connection_status
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"[UserService] Error fetching platform connections: {e}", exc_info=True)
+            logger.error("[UserService] Error fetching platform connections: %s", e, exc_info=True)
             raise HTTPException(status_code=500, detail=f"Internal error retrieving platform connections: {e}")
 
     @staticmethod
@@ -44,12 +46,12 @@ class UserService:
             success = db_disconnect_platform(user_id, platform)
             if not success:
                 raise HTTPException(status_code=404, detail="User not found")
-            logger.info(f"[UserService] Disconnected {platform} for user_id={user_id}")
+            logger.info("[UserService] Disconnected %s for user_id=%s", platform, user_id)
             return {"message": f"{platform} disconnected successfully"}
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"[UserService] Error disconnecting {platform}: {e}", exc_info=True)
+            logger.error("[UserService] Error disconnecting %s: %s", platform, e, exc_info=True)
             raise HTTPException(status_code=500, detail=f"Internal error disconnecting platform: {e}")
 
     @staticmethod
@@ -58,9 +60,10 @@ class UserService:
         Retrieves basic profile information for the given user.
         """
         try:
-            user_data = get_user_by_id(user_id)
+            # Only what the profile returns: skips tokens, OTP state and rate-limit history
+            user_data = get_user_by_id(user_id, PROFILE_PROJECTION)
             if not user_data:
-                logger.warning(f"[UserService] User not found: {user_id}")
+                logger.warning("[UserService] User not found: %s", user_id)
                 raise HTTPException(status_code=404, detail="User not found")
 
             return {
@@ -71,5 +74,5 @@ class UserService:
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"[UserService] Error fetching profile for {user_id}: {e}", exc_info=True)
+            logger.error("[UserService] Error fetching profile for %s: %s", user_id, e, exc_info=True)
             raise HTTPException(status_code=500, detail=f"Internal error retrieving user profile: {e}")
@@ -16,7 +16,10 @@ Key points:
 from __future__ import annotations
 
 from typing import List, Dict, Optional
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 
 from app.config.config import settings
@@ -28,6 +31,17 @@ logger = get_logger()
 # NOTE: Updated to v23 for latest features (Performance Max / Demand Gen segmentation)
 BASE_URL = "https://googleads.googleapis.com/v23"
 
+# One pooled keep-alive session for every Google call (OAuth, userinfo, Ads REST),
+# so repeat calls from the sync threads skip the TCP+TLS handshake.
+# Status retries follow urllib3's idempotent-method default, so POSTs (one-time
+# OAuth codes, GAQL searches) are only retried when the connection never opened.
+session = requests.Session()
+session.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504), raise_on_status=False),
+))
+
 
 # ---------------------------------------------------------------------------
 # Internal helpers
@@ -88,12 +102,12 @@ def refresh_google_access_token(user_id: str) -> Optional[str]:
     }
 
     try:
-        resp = requests.post("https://oauth2.googleapis.com/token", data=payload, timeout=20)
+        resp = session.post("https://oauth2.googleapis.com/token", data=payload, timeout=20)
         if resp.status_code != 200:
             logger.error(f"[Google Refresh] Failed to refresh token for user {user_id}: {resp.text}")
             return None
 
-        token_data = resp.json()
+        token_data = orjson.loads(resp.content)
         new_access_token = token_data.get("access_token")
         expires_in = token_data.get("expires_in", 3600)
 
@@ -122,7 +136,7 @@ def list_accessible_customers(access_token: str) -> Optional[requests.Response]:
     url = f"{BASE_URL}/customers:listAccessibleCustomers"
     logger.info("Attempting to list accessible customers...")
     try:
-        resp = requests.get(url, headers=_headers(access_token), timeout=20)
+        resp = session.get(url, headers=_headers(access_token), timeout=20)
         resp.raise_for_status()
         logger.info("Successfully listed accessible customers.")
         return resp
@@ -173,10 +187,10 @@ def get_account_details_batch(access_token: str, customer_ids: List[str]) -> Lis
 
     logger.info(f"Querying account details for IDs: {customer_ids} using login ID {query_login_customer_id}")
     try:
-        resp = requests.post(url, headers=_headers(access_token, query_login_customer_id), json=payload, timeout=30)
+        resp = session.post(url, headers=_headers(access_token, query_login_customer_id), json=payload, timeout=30)
         
         if resp.status_code == 200:
-            results = resp.json().get("results", [])
+            results = orjson.loads(resp.content).get("results", [])
             found_ids = set()
             for item in results:
                 client = item.get("customerClient", {}) or {}
@@ -256,7 +270,7 @@ def list_campaigns_for_child(
 
     payload = {"query": query}
     try:
-        resp = requests.post(url, headers=_headers(access_token, login_customer_id), json=payload, timeout=60)
+        resp = session.post(url, headers=_headers(access_token, login_customer_id), json=payload, timeout=60)
         if resp.status_code != 200:
             logger.error(f"[Google Ads] Campaign fetch failed {resp.status_code}: {resp.text}")
         return resp
@@ -300,7 +314,7 @@ def list_adgroups_for_campaign(
 
     payload = {"query": query}
     try:
-        resp = requests.post(url, headers=_headers(access_token, login_customer_id), json=payload, timeout=60)
+        resp = session.post(url, headers=_headers(access_token, login_customer_id), json=payload, timeout=60)
         if resp.status_code != 200:
             logger.error(f"[Google Ads] AdGroup fetch failed {resp.status_code}: {resp.text}")
         return resp
@@ -349,7 +363,7 @@ def list_ads_for_adgroup(
 
     payload = {"query": query}
     try:
-        resp = requests.post(url, headers=_headers(access_token, login_customer_id), json=payload, timeout=60)
+        resp = session.post(url, headers=_headers(access_token, login_customer_id), json=payload, timeout=60)
         if resp.status_code != 200:
             logger.error(f"[Google Ads] Ads fetch failed {resp.status_code}: {resp.text}")
         return resp
@@ -386,10 +400,10 @@ def get_direct_client_accounts(access_token: str, manager_customer_id: str) -> L
     client_accounts: List[Dict] = []
 
     try:
-        resp = requests.post(url, headers=_headers(access_token, cleaned_manager_id), json=payload, timeout=60)
+        resp = session.post(url, headers=_headers(access_token, cleaned_manager_id), json=payload, timeout=60)
         
         if resp.status_code == 200:
-            results = resp.json().get("results", [])
+            results = orjson.loads(resp.content).get("results", [])
             for item in results:
                 client = item.get("customerClient", {}) or {}
                 acc_id = client.get("id")
@@ -456,7 +470,7 @@ def get_campaign_daily_insights(
     
     try:
         logger.info(f"[Google API] Fetching daily campaign insights for {customer_id} from {start_date} to {end_date}")
-        response = requests.post(
+        response = session.post(
             url, 
             headers=_headers(access_token, login_customer_id),
             json=payload, 
@@ -502,7 +516,7 @@ def get_adgroup_daily_insights(
     
     try:
         logger.info(f"[Google API] Fetching daily ad group insights for {customer_id}")
-        response = requests.post(
+        response = session.post(
             url,
             headers=_headers(access_token, login_customer_id),
             json=payload,
@@ -549,7 +563,7 @@ def get_ad_daily_insights(
     
     try:
         logger.info(f"[Google API] Fetching daily ad insights for {customer_id}")
-        response = requests.post(
+        response = session.post(
             url,
             headers=_headers(access_token, login_customer_id),
             json=payload,
@@ -624,7 +638,7 @@ def get_campaign_insights(
 
     payload = {"query": query}
     try:
-        resp = requests.post(
+        resp = session.post(
             url,
             headers=_headers(access_token, login_customer_id),
             json=payload,
@@ -633,7 +647,7 @@ def get_campaign_insights(
         if resp.status_code != 200:
             logger.error(f"[Google Ads] Campaign insights failed {resp.status_code}: {resp.text}")
             return []
-        results = resp.json().get("results", [])
+        results = orjson.loads(resp.content).get("results", [])
         insights = []
         for item in results:
             campaign = item.get("campaign", {})
@@ -698,7 +712,7 @@ def get_adgroup_insights(
 
     payload = {"query": query}
     try:
-        resp = requests.post(
+        resp = session.post(
             url,
             headers=_headers(access_token, login_customer_id),
             json=payload,
@@ -707,7 +721,7 @@ def get_adgroup_insights(
         if resp.status_code != 200:
             logger.error(f"[Google Ads] AdGroup insights failed {resp.status_code}: {resp.text}")
             return []
-        results = resp.json().get("results", [])
+        results = orjson.loads(resp.content).get("results", [])
         insights = []
         for item in results:
             ad_group = item.get("adGroup", {})
@@ -773,7 +787,7 @@ def get_ad_insights(
 
     payload = {"query": query}
     try:
-        resp = requests.post(
+        resp = session.post(
             url,
             headers=_headers(access_token, login_customer_id),
             json=payload,
@@ -782,7 +796,7 @@ def get_ad_insights(
         if resp.status_code != 200:
             logger.error(f"[Google Ads] Ad insights failed {resp.status_code}: {resp.text}")
             return []
-        results = resp.json().get("results", [])
+        results = orjson.loads(resp.content).get("results", [])
         insights = []
         for item in results:
             ad = item.get("adGroupAd", {}).get("ad", {})
@@ -845,7 +859,7 @@ def list_all_adgroups_for_customer(
 
     payload = {"query": query}
     try:
-        resp = requests.post(
+        resp = session.post(
             url,
             headers=_headers(access_token, login_customer_id),
             json=payload,
@@ -854,7 +868,7 @@ def list_all_adgroups_for_customer(
         if resp.status_code != 200:
             logger.error(f"[Google Ads] All adgroups fetch failed {resp.status_code}: {resp.text}")
             return []
-        return resp.json().get("results", [])
+        return orjson.loads(resp.content).get("results", [])
     except Exception as e:
         logger.exception(f"[Google Ads] Unexpected error fetching all adgroups: {e}")
         return []
@@ -895,7 +909,7 @@ def list_all_ads_for_customer(
 
     payload = {"query": query}
     try:
-        resp = requests.post(
+        resp = session.post(
             url,
             headers=_headers(access_token, login_customer_id),
             json=payload,
@@ -904,7 +918,7 @@ def list_all_ads_for_customer(
         if resp.status_code != 200:
             logger.error(f"[Google Ads] All ads fetch failed {resp.status_code}: {resp.text}")
             return []
-        return resp.json().get("results", [])
+        return orjson.loads(resp.content).get("results", [])
     except Exception as e:
         logger.exception(f"[Google Ads] Unexpected error fetching all ads: {e}")
         return []
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Shared HTTP Client
+------------------
+Process-wide httpx.AsyncClient for outbound platform calls.
+
+- One keep-alive connection pool (HTTP/2 where the server supports it)
+- Awaited from async routes so the event loop is free during network waits
+- Exposed as app.state.http and closed when the FastAPI lifespan exits
+"""
+
+import httpx
+
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+client = httpx.AsyncClient(
+    http2=True,
+    timeout=10.0,
+    # Idle sockets stay pooled for a minute so paged Shopify/Graph pulls reuse them
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=60),
+)
+
+
+async def close_http_client():
+    """Release pooled connections on application shutdown."""
+    await client.aclose()
+    logger.info("[HTTP] Shared client closed.")
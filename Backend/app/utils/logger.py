@@ -6,10 +6,13 @@ Centralized logger setup.
 - Prints to console in readable format
 - Uses timezone-aware timestamps
 - Controlled via LOG_LEVEL or DEBUG in .env
+- Handlers run on a background QueueListener thread, so callers never block on I/O
 """
 
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 import os
 from datetime import datetime
 from zoneinfo import ZoneInfo  # Python 3.9+
@@ -65,10 +68,16 @@ console_handler = logging.StreamHandler()
 console_formatter = TZFormatter("[%(levelname)s] %(message)s")
 console_handler.setFormatter(console_formatter)
 
+# Records are enqueued on the caller's thread (event loop included) and
+# written to file/console by the listener thread.
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+queue_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+
 # Prevent duplicate handlers if re-imported
 if not logger.handlers:
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(QueueHandler(log_queue))
+    queue_listener.start()
+    atexit.register(queue_listener.stop)  # flush queued records on shutdown
 
 def get_logger():
     """Returns the singleton logger instance."""
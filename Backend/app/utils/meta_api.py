@@ -7,16 +7,36 @@ and generating clean monthly ranges for historical analysis.
 
 import asyncio
 import ast
+import threading
+from contextlib import nullcontext
 from datetime import date
-from typing import List, Tuple, Dict, Any
+from urllib.parse import urlparse
+from typing import AsyncIterator, List, Optional, Tuple, Dict, Any, Sequence, Union
 from dateutil.relativedelta import relativedelta
 import httpx
+import orjson
 from fastapi import HTTPException
 
+from app.utils.http_client import client as http_client
 from app.utils.logger import get_logger
 
 logger = get_logger()
 
+# Query params may be a dict or a pre-built sequence of (key, value) pairs
+QueryParams = Union[Dict[str, Any], Sequence[Tuple[str, Any]]]
+
+# Insights pages are large JSON bodies; always negotiate compression explicitly
+GRAPH_HEADERS = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+GRAPH_PAGE_TIMEOUT = 60.0
+
+# Graph paginations in flight per ad account, across levels, month windows and jobs
+ACCOUNT_CONCURRENCY = 5
+GATE_POLL_INTERVAL = 0.2  # Seconds between tries for a free account slot
+# Graph throttling error codes: application (4), user (17), ad account (613)
+RATE_LIMIT_CODES = frozenset({4, 17, 613})
+RATE_LIMIT_BACKOFF = 60.0  # Seconds before the first retry; doubles per attempt
+RATE_LIMIT_RETRIES = 4
+
 
 # ---------------------------------------------------------------------------
 # 📅 Date Utilities
@@ -49,32 +69,98 @@ def generate_monthly_ranges(start_date: date, end_date: date) -> List[Tuple[str,
 
 
 # ---------------------------------------------------------------------------
-# 🔁 Async Pagination Helper
+# 🚦 Per-Account Concurrency
+# ---------------------------------------------------------------------------
+class AccountGate:
+    """
+    Caps concurrent Graph paginations for one ad account.
+
+    Historical syncs run on job-pool threads, each on its own event loop, so this
+    is a thread-safe counter polled from async code rather than an asyncio.Semaphore.
+    The cap is per API process.
+    """
+
+    def __init__(self, limit: int):
+        self._slots = threading.BoundedSemaphore(limit)
+
+    async def __aenter__(self):
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(GATE_POLL_INTERVAL)
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+
+
+_account_gates: Dict[str, AccountGate] = {}
+_account_gates_lock = threading.Lock()
+
+
+def account_gate(account_key: str) -> AccountGate:
+    """The shared gate for an ad account (numeric id, without the act_ prefix)."""
+    with _account_gates_lock:
+        gate = _account_gates.get(account_key)
+        if gate is None:
+            gate = _account_gates[account_key] = AccountGate(ACCOUNT_CONCURRENCY)
+        return gate
+
+
+def new_graph_client() -> httpx.AsyncClient:
+    """
+    Client for one background job run. The shared client is bound to the API
+    event loop, so a job on its own loop pages through one of these instead.
+    """
+    return httpx.AsyncClient(http2=True, timeout=GRAPH_PAGE_TIMEOUT, headers=GRAPH_HEADERS)
+
+
+def _graph_error_code(resp: httpx.Response) -> Optional[int]:
+    """The Graph API error.code of a failed response, if its body carries one."""
+    try:
+        return orjson.loads(resp.content).get("error", {}).get("code")
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# 🔁 Async Pagination Helpers
 # ---------------------------------------------------------------------------
-async def fetch_paginated_insights(start_url: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def iter_paginated_insights(
+    start_url: str,
+    params: QueryParams,
+    client: Optional[httpx.AsyncClient] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
     """
-    Asynchronously fetch all pages of insights data from the Meta Graph API.
+    Asynchronously yield each page of insights data from the Meta Graph API.
 
     Handles:
-        - Rate limiting (x-business-use-case-usage header)
+        - Rate limiting (x-business-use-case-usage header, error codes 4/17/613)
         - Temporary unavailability (status 400)
         - Auth errors (401/403)
         - Pagination via 'paging.next'
 
+    The whole pagination holds one of the ad account's ACCOUNT_CONCURRENCY slots.
+
     Args:
         start_url (str): Base endpoint to start fetching from.
-        params (dict): Query parameters for the first request.
+        params (dict | list[tuple]): Query parameters for the first request.
+        client (httpx.AsyncClient, optional): Defaults to the shared client; jobs on
+            their own event loop pass a new_graph_client().
 
-    Returns:
-        list[dict]: Combined list of all data objects fetched across pages.
+    Yields:
+        list[dict]: The data objects of a single page.
     """
-    all_data: List[Dict[str, Any]] = []
+    client = client or http_client
     next_url: str = start_url
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    total = 0
+    rate_limited = 0
+    # Usage headers are keyed by the numeric account id found in the URL path
+    account_key = next(
+        (seg[4:] for seg in urlparse(start_url).path.split("/") if seg.startswith("act_")), ""
+    )
+
+    async with account_gate(account_key) if account_key else nullcontext():
         while next_url:
             try:
-                resp = await client.get(next_url, params=params)
+                resp = await client.get(next_url, params=params, headers=GRAPH_HEADERS, timeout=GRAPH_PAGE_TIMEOUT)
                 usage_header = resp.headers.get("x-business-use-case-usage")
 
                 # 🧭 Handle rate-limit header
@@ -83,7 +169,6 @@ async def fetch_paginated_insights(start_url: str, params: Dict[str, Any]) -> Li
                         usage_data = ast.literal_eval(usage_header)
                         logger.info(f"[Meta API] Usage header: {usage_data}")
                         # Throttle if call count exceeds 80%
-                        account_key = params.get("ad_account_id", "").replace("act_", "")
                         if usage_data.get(account_key, [{}])[0].get("call_count", 0) > 80:
                             logger.warning("Approaching rate limit. Sleeping 10s.")
                             await asyncio.sleep(10)
@@ -96,17 +181,29 @@ async def fetch_paginated_insights(start_url: str, params: Dict[str, Any]) -> Li
                     await asyncio.sleep(30)
                     continue
 
-                resp.raise_for_status()
-                data = resp.json()
+                # Graph throttling arrives as 400/403 with an app, user or ad-account limit code
+                if resp.is_error and _graph_error_code(resp) in RATE_LIMIT_CODES:
+                    if rate_limited == RATE_LIMIT_RETRIES:
+                        raise HTTPException(status_code=429, detail="Meta rate limit exceeded.")
+                    wait_time = RATE_LIMIT_BACKOFF * 2 ** rate_limited
+                    rate_limited += 1
+                    logger.warning(f"[Meta API] Rate limit hit. Retrying in {wait_time:.0f}s (attempt {rate_limited}).")
+                    await asyncio.sleep(wait_time)
+                    continue  # Retry the same request (next_url hasn't changed)
 
-                # Accumulate data
-                if "data" in data:
-                    all_data.extend(data["data"])
+                resp.raise_for_status()
+                rate_limited = 0
+                data = orjson.loads(resp.content)
 
                 # Follow pagination link if available
                 next_url = data.get("paging", {}).get("next", None)
                 params = {}  # clear params after first request
 
+                page = data.get("data")
+                if page:
+                    total += len(page)
+                    yield page
+
                 await asyncio.sleep(1)
 
             except httpx.ReadTimeout:
@@ -114,29 +211,33 @@ async def fetch_paginated_insights(start_url: str, params: Dict[str, Any]) -> Li
                 await asyncio.sleep(15)
             except httpx.HTTPStatusError as e:
                 logger.error(f"[Meta API] HTTP error {e.response.status_code}: {e.response.text}")
-
-                is_rate_limit = False
-                if e.response.status_code == 403:
-                    try:
-                        error_data = e.response.json()
-                        error_type = error_data.get("error", {}).get("type")
-                        is_transient = error_data.get("error", {}).get("is_transient")
-                        if error_type == "OAuthException" and is_transient:
-                            is_rate_limit = True
-                    except Exception:
-                        pass # Not a JSON response, not a rate limit we can parse
-
-                if is_rate_limit:
-                    logger.warning("[Meta API] Rate limit hit. Sleeping for 60 seconds...")
-                    await asyncio.sleep(60) # Sleep for 1 minute
-                    continue # Retry the same request (next_url hasn't changed)
-
                 if e.response.status_code in [401, 403]:
                     raise HTTPException(status_code=e.response.status_code, detail="Meta auth failure.")
                 break
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.exception(f"[Meta API] Unexpected error: {e}")
                 break
 
-    logger.info(f"[Meta API] Completed pagination. Total records: {len(all_data)}")
+    logger.info(f"[Meta API] Completed pagination. Total records: {total}")
+
+
+async def fetch_paginated_insights(
+    start_url: str,
+    params: QueryParams,
+    client: Optional[httpx.AsyncClient] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Asynchronously fetch all pages of insights data into a single list.
+
+    Prefer `iter_paginated_insights` for large pulls so pages can be
+    persisted as they arrive instead of being held in memory.
+
+    Returns:
+        list[dict]: Combined list of all data objects fetched across pages.
+    """
+    all_data: List[Dict[str, Any]] = []
+    async for page in iter_paginated_insights(start_url, params, client):
+        all_data.extend(page)
     return all_data
@@ -1,15 +1,21 @@
 # FILE: app/utils/security.py
 
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+import hashlib
+import math
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Optional
+from cachetools import TTLCache
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from pymongo import MongoClient
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from datetime import datetime, timedelta
 from bson import ObjectId
 import os
 
 from app.config.config import settings
+from app.database.mongo_client import async_db
 from app.utils.logger import get_logger
 
 logger = get_logger()
@@ -20,7 +26,19 @@ logger = get_logger()
 SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24))
-STATE_TOKEN_EXPIRE_MINUTES = 15
+STATE_TOKEN_EXPIRE_MINUTES = 5  # Only has to survive the provider consent screen
+STATE_TOKEN_PURPOSE = "oauth_state"
+
+# Built once: jose then skips its per-call JSON/JWK parsing of the raw secret
+_JWT_KEY = jwk.construct(SECRET_KEY, ALGORITHM) if SECRET_KEY else SECRET_KEY
+_JWT_ALGORITHMS = [ALGORITHM]
+
+# Verified JWT payloads (access and OAuth state tokens alike) for a short window, so a
+# client's burst of requests with the same Bearer token verifies the signature once.
+# Keyed by a 16-byte digest of the token; callers always get their own copy.
+VERIFIED_TOKEN_CACHE_SECONDS = 30
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=VERIFIED_TOKEN_CACHE_SECONDS)
+_token_cache_lock = Lock()
 
 # --------------------------------------------------------------------
 # 🧭 OAuth2 Scheme
@@ -30,9 +48,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/verify-otp")
 # --------------------------------------------------------------------
 # 🧱 Mongo Setup (Rate Limiting)
 # --------------------------------------------------------------------
-client = MongoClient(settings.MONGO_URI)
-db = client[settings.DB_NAME]
-users_collection = db["users"]
+users_collection = async_db["users"]  # Shared pool from app.database.mongo_client
 HOURLY_LIMIT = 50
 
 # --------------------------------------------------------------------
@@ -43,7 +59,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -51,24 +67,37 @@ def create_state_token(data: dict):
     """Creates a short-lived token used only for OAuth state verification."""
     expire = datetime.utcnow() + timedelta(minutes=STATE_TOKEN_EXPIRE_MINUTES)
     to_encode = data.copy()
-    to_encode.update({"exp": expire, "purpose": "oauth_state"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "purpose": STATE_TOKEN_PURPOSE})
+    return jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
 
 
 def decode_token(token: str):
-    """Validates and decodes any JWT."""
+    """Validates and decodes any JWT (verified payloads cached, see VERIFIED_TOKEN_CACHE_SECONDS)."""
+    key = _token_key(token)
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+    # Re-check exp on hits: a token may expire inside the cache window
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return dict(payload)
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
         user_identifier = payload.get("sub")
         if not user_identifier:
             logger.warning("[AUTH] Token missing 'sub' claim.")
             raise credentials_exception
-        return payload
+        with _token_cache_lock:
+            _token_cache[key] = payload
+        return dict(payload)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,12 +109,55 @@ def decode_token(token: str):
         raise credentials_exception
 
 
+def decode_state_token(token: str):
+    """
+    Validates an OAuth state token offline (local HS256 secret, no introspection)
+    and rejects any JWT not minted by create_state_token.
+    Verification is cached by decode_token.
+    """
+    payload = decode_token(token)
+    if payload.get("purpose") != STATE_TOKEN_PURPOSE:
+        logger.warning("[AUTH] Token is not an OAuth state token.")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid OAuth state")
+    return payload
+
+
+# --------------------------------------------------------------------
+# 🪪 JWT Middleware (decode once per request)
+# --------------------------------------------------------------------
+class JWTAuthMiddleware:
+    """
+    Pure ASGI middleware: verifies a Bearer JWT once per request and stores the
+    payload (or the auth error) in request.state for get_current_user_id.
+    Requests without a Bearer header pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            auth = dict(scope["headers"]).get(b"authorization", b"")
+            if auth[:7].lower() == b"bearer ":
+                state = scope.setdefault("state", {})
+                try:
+                    state["jwt_payload"] = decode_token(auth[7:].decode("latin-1"))
+                except HTTPException as e:
+                    state["jwt_error"] = e
+        await self.app(scope, receive, send)
+
+
 # --------------------------------------------------------------------
 # 👤 Current User Extraction
 # --------------------------------------------------------------------
-async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
-    """Extracts MongoDB user ID from JWT."""
-    payload = decode_token(token)
+async def get_current_user_id(request: Request, token: str = Depends(oauth2_scheme)) -> str:
+    """Extracts MongoDB user ID from the JWT (already decoded by JWTAuthMiddleware)."""
+    payload = getattr(request.state, "jwt_payload", None)
+    if payload is None:
+        error = getattr(request.state, "jwt_error", None)
+        if error is not None:
+            raise error
+        payload = decode_token(token)  # middleware not installed
     mongo_user_id = payload.get("user_id")
 
     if not mongo_user_id:
@@ -110,7 +182,7 @@ async def rate_limiter(user_id: str = Depends(get_current_user_id)) -> str:
         logger.warning(f"[RATE] Invalid ObjectId for user_id={user_id}")
         raise HTTPException(status_code=401, detail="Invalid user identifier.")
 
-    user = users_collection.find_one({"_id": query_user_oid})
+    user = await users_collection.find_one({"_id": query_user_oid})
 
     # 🧹 Filter old timestamps
     if user and "query_timestamps" in user:
@@ -126,13 +198,13 @@ async def rate_limiter(user_id: str = Depends(get_current_user_id)) -> str:
             )
 
         # Update timestamps
-        users_collection.update_one(
+        await users_collection.update_one(
             {"_id": query_user_oid},
             {"$push": {"query_timestamps": now}}
         )
     else:
         # Create or reset timestamps list
-        users_collection.update_one(
+        await users_collection.update_one(
             {"_id": query_user_oid},
             {"$set": {"query_timestamps": [now]}},
             upsert=True
@@ -141,3 +213,42 @@ async def rate_limiter(user_id: str = Depends(get_current_user_id)) -> str:
             logger.info(f"[RATE] Created rate tracking doc for user {user_id}")
 
     return user_id
+
+
+# --------------------------------------------------------------------
+# 🪟 Sliding-Window Limiter (per authenticated user)
+# --------------------------------------------------------------------
+class SlidingWindowLimiter:
+    """
+    In-process sliding-window limiter used as a route dependency.
+    Allows `limit` calls per `window_seconds` for each authenticated user
+    (the JWT's user_id, never a path parameter). A user's hits expire with
+    the window, so idle users cost no memory.
+
+    State is per worker process: with N uvicorn workers a user can make up
+    to N × `limit` calls per window.
+    """
+
+    def __init__(self, limit: int, window_seconds: int, maxsize: int = 10_000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._hits: TTLCache = TTLCache(maxsize=maxsize, ttl=window_seconds)
+        self._lock = Lock()
+
+    def __call__(self, request: Request, user_id: str = Depends(get_current_user_id)):
+        now = time.monotonic()
+        with self._lock:
+            hits: Deque[float] = self._hits.get(user_id) or deque()
+            while hits and hits[0] <= now - self.window_seconds:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                retry_after = math.ceil(hits[0] + self.window_seconds - now)
+                logger.warning(f"[RATE] {request.url.path} throttled for {user_id}")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many sync requests. Please try again shortly.",
+                    headers={"Retry-After": str(retry_after)},
+                )
+            hits.append(now)
+            # Re-set on every hit: the entry expires one window after the user's last call
+            self._hits[user_id] = hits
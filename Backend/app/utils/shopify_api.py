@@ -9,22 +9,94 @@ Handles:
 - Convenience wrappers for fetching common entities like orders, products, etc.
 """
 
-import time
-import requests
-from typing import Any, Dict, List, Optional
+import asyncio
+import httpx
+import orjson
+from operator import itemgetter
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app.utils.http_client import client as http_client
 from app.utils.logger import get_logger
 
 logger = get_logger()
 API_VERSION = "2025-10"
+SHARD_DAYS = 30  # Date-window size for sharded historical pulls
+# GraphQL requests in flight per shop, across every resource and date window:
+# a sync's orders, products and customers all draw on the shop's one cost bucket
+SHOP_CONCURRENCY = 5
+GRAPHQL_MAX_RETRIES = 5  # 429 / THROTTLED retries before a call fails
+THROTTLE_MIN_WAIT = 1.0  # Seconds
+THROTTLE_MAX_WAIT = 30.0
+BULK_POLL_INITIAL = 2.0  # Seconds before the first bulk-operation status poll
+BULK_POLL_MAX = 30.0  # Poll backoff ceiling
+BULK_CONCURRENCY = 5  # Bulk jobs being submitted/polled at once per process
+# Concurrent pulls multiplex as HTTP/2 streams on the shared client, so a request
+# mostly waits on Shopify: fail fast on connect and on pool checkout, allow slow pages
+GRAPHQL_TIMEOUT = httpx.Timeout(20.0, connect=3.0, pool=5.0)
+
+BULK_RUN_MUTATION = """
+mutation RunBulk($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+WARMUP_QUERY = "query { shop { id } }"
+
+BULK_STATUS_QUERY = """
+query { currentBulkOperation { id status errorCode objectCount url } }
+"""
+
+_bulk_semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+_shop_semaphores: Dict[str, asyncio.Semaphore] = {}
+_node_of = itemgetter("node")
 
 
 # ---------------------------------------------------------------------------
 # 🧩 Core GraphQL Query Executor
 # ---------------------------------------------------------------------------
-def _graphql(shop_url: str, token: str, query: str, variables: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+class ShopifyAPIError(Exception):
+    """A GraphQL call failed for good: retries exhausted, HTTP error or GraphQL errors."""
+
+
+def _shop_semaphore(shop_url: str) -> asyncio.Semaphore:
+    """The one request gate per shop, shared by every resource and window pulling from it."""
+    semaphore = _shop_semaphores.get(shop_url)
+    if semaphore is None:
+        semaphore = _shop_semaphores[shop_url] = asyncio.Semaphore(SHOP_CONCURRENCY)
+    return semaphore
+
+
+def _throttle_delay(data: Dict[str, Any], attempt: int) -> float:
+    """
+    Seconds until the shop's cost bucket can afford the throttled query again,
+    from extensions.cost.throttleStatus; exponential backoff when Shopify sends none.
+    """
+    cost = (data.get("extensions") or {}).get("cost") or {}
+    status = cost.get("throttleStatus") or {}
+    restore_rate = status.get("restoreRate")
+    if restore_rate:
+        deficit = (cost.get("requestedQueryCost") or 0) - (status.get("currentlyAvailable") or 0)
+        delay = deficit / restore_rate
+    else:
+        delay = THROTTLE_MIN_WAIT * 2 ** attempt
+    return min(max(delay, THROTTLE_MIN_WAIT), THROTTLE_MAX_WAIT)
+
+
+def _is_throttled(errors: List[Dict[str, Any]]) -> bool:
+    """Shopify reports cost throttling as HTTP 200 with a THROTTLED error code."""
+    return any((error.get("extensions") or {}).get("code") == "THROTTLED" for error in errors)
+
+
+async def _graphql(shop_url: str, token: str, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Execute a GraphQL query against the Shopify Admin API.
 
+    HTTP 429 and cost-throttled (HTTP 200, THROTTLED) responses are retried up to
+    GRAPHQL_MAX_RETRIES times; at most SHOP_CONCURRENCY requests per shop are in flight.
+
     Args:
         shop_url (str): The merchant's Shopify shop domain.
         token (str): The access token for authenticated API calls.
@@ -32,42 +104,55 @@ def _graphql(shop_url: str, token: str, query: str, variables: Optional[Dict[str
         variables (dict, optional): Variables for the query.
 
     Returns:
-        dict | None: JSON response data, or None if the request failed.
+        dict: JSON response data.
+
+    Raises:
+        ShopifyAPIError: The request failed, returned GraphQL errors, or stayed throttled.
     """
     url = f"https://{shop_url}/admin/api/{API_VERSION}/graphql.json"
     headers = {
         "X-Shopify-Access-Token": token,
         "Content-Type": "application/json",
     }
+    payload = {"query": query, "variables": variables or {}}
 
-    try:
-        response = requests.post(url, headers=headers, json={"query": query, "variables": variables or {}}, timeout=20)
-
-        # Handle rate limiting
-        if response.status_code == 429:
-            wait_time = int(response.headers.get("Retry-After", "2"))
-            logger.warning(f"[Shopify API] Rate limited — retrying in {wait_time}s")
-            time.sleep(wait_time)
-            return _graphql(shop_url, token, query, variables)
-
-        response.raise_for_status()
-        data = response.json()
+    for attempt in range(GRAPHQL_MAX_RETRIES + 1):
+        try:
+            async with _shop_semaphore(shop_url):
+                response = await http_client.post(url, headers=headers, json=payload, timeout=GRAPHQL_TIMEOUT)
+
+            # Handle rate limiting
+            if response.status_code == 429:
+                wait_time = float(response.headers.get("Retry-After", "2"))
+                logger.warning("[Shopify API] Rate limited — retrying in %ss", wait_time)
+                await asyncio.sleep(wait_time)
+                continue
+
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+        except httpx.HTTPError as e:
+            raise ShopifyAPIError(f"HTTP error: {e}") from e
+        except ValueError as e:
+            raise ShopifyAPIError(f"Invalid JSON response: {e}") from e
 
         # Handle GraphQL errors
-        if "errors" in data:
-            logger.error(f"[Shopify API] GraphQL errors: {data['errors']}")
-            return None
+        errors = data.get("errors")
+        if not errors:
+            return data
+        if not _is_throttled(errors):
+            logger.error("[Shopify API] GraphQL errors: %s", errors)
+            raise ShopifyAPIError(f"GraphQL errors: {errors}")
+
+        wait_time = _throttle_delay(data, attempt)
+        logger.warning("[Shopify API] Cost throttled on %s — retrying in %.1fs", shop_url, wait_time)
+        await asyncio.sleep(wait_time)
 
-        return data
+    raise ShopifyAPIError(f"Still rate limited after {GRAPHQL_MAX_RETRIES} retries")
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"[Shopify API] HTTP error: {e}")
-    except ValueError as e:
-        logger.error(f"[Shopify API] Invalid JSON response: {e}")
-    except Exception as e:
-        logger.exception(f"[Shopify API] Unexpected error: {e}")
 
-    return None
+async def warm_connection(shop_url: str, token: str) -> None:
+    """Open the pooled HTTP/2 connection to a shop with a trivial query, so the next pull skips the handshake."""
+    await _graphql(shop_url, token, WARMUP_QUERY)
 
 
 # ---------------------------------------------------------------------------
@@ -76,17 +161,18 @@ def _graphql(shop_url: str, token: str, query: str, variables: Optional[Dict[str
 # ---------------------------------------------------------------------------
 # 🔁 Pagination Helper (Updated for historical pulls)
 # ---------------------------------------------------------------------------
-def _iterate(
+async def _iterate_pages(
     shop_url: str,
     token: str,
     connection: str,
     node_fields: str,
     variables: Optional[Dict[str, Any]] = None,
     query_filter: Optional[str] = None,
-) -> List[Dict[str, Any]]:
+) -> AsyncIterator[List[Dict[str, Any]]]:
     """
-    Iteratively fetch all pages for a given GraphQL connection.
-    Supports optional query filters (e.g., date range).
+    Yield the nodes of a GraphQL connection one page (up to 100) at a time,
+    following the cursor. Supports optional query filters (e.g., date range).
+    Finishes only once hasNextPage is false; a failed page raises ShopifyAPIError.
 
     Args:
         shop_url: The merchant's shop domain.
@@ -111,116 +197,310 @@ def _iterate(
     """
 
     cursor = None
-    all_nodes: List[Dict[str, Any]] = []
 
     while True:
-        response = _graphql(shop_url, token, query, {"cursor": cursor, **(variables or {})})
-        if not response:
-            break
+        response = await _graphql(shop_url, token, query, {"cursor": cursor, **(variables or {})})
 
         try:
             connection_data = response["data"][connection]
             edges = connection_data.get("edges", [])
-            all_nodes.extend(e["node"] for e in edges)
+            has_next = connection_data["pageInfo"]["hasNextPage"]
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ShopifyAPIError(f"Unexpected response structure for '{connection}': {e}") from e
 
-            if not connection_data["pageInfo"]["hasNextPage"]:
-                break
+        yield list(map(_node_of, edges))
 
-            cursor = edges[-1]["cursor"]
-            logger.info(f"[Shopify API] Fetched {len(all_nodes)} records from '{connection}' so far")
+        if not has_next or not edges:
+            return
+        cursor = edges[-1]["cursor"]
 
-        except KeyError as e:
-            logger.error(f"[Shopify API] Unexpected response structure: {e}")
-            break
 
-    logger.info(f"[Shopify API] Completed fetching {len(all_nodes)} total records from '{connection}'")
+async def _iterate(
+    shop_url: str,
+    token: str,
+    connection: str,
+    node_fields: str,
+    variables: Optional[Dict[str, Any]] = None,
+    query_filter: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Fetch every page of a GraphQL connection into one list (see _iterate_pages)."""
+    all_nodes: List[Dict[str, Any]] = []
+    async for nodes in _iterate_pages(shop_url, token, connection, node_fields, variables, query_filter):
+        all_nodes.extend(nodes)
+        logger.info("[Shopify API] Fetched %s records from '%s' so far", len(all_nodes), connection)
+
+    logger.info("[Shopify API] Completed fetching %s total records from '%s'", len(all_nodes), connection)
     return all_nodes
 
 
+def _shard_filters(date_field: str, start_date: date, end_date: date) -> List[str]:
+    """
+    Split [start_date, end_date] into SHARD_DAYS query filters.
+    Windows are half-open except the last, so no record is fetched twice.
+    """
+    bounds = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = window_start + timedelta(days=SHARD_DAYS)
+        if window_end > end_date:
+            bounds.append(f"{date_field}:>={window_start} AND {date_field}:<={end_date}")
+        else:
+            bounds.append(f"{date_field}:>={window_start} AND {date_field}:<{window_end}")
+        window_start = window_end
+    return bounds
+
+
+async def _iterate_sharded_pages(
+    shop_url: str,
+    token: str,
+    connection: str,
+    node_fields: str,
+    date_field: str,
+    start_date: date,
+    end_date: date,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Page each SHARD_DAYS window's cursor chain concurrently and yield pages as
+    they land, in arrival order. Requests share the shop's SHOP_CONCURRENCY gate
+    with every other pull; the queue is bounded, so shards pause while the
+    consumer is busy.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SHOP_CONCURRENCY)
+
+    async def pull(query_filter: str):
+        async for page in _iterate_pages(shop_url, token, connection, node_fields, query_filter=query_filter):
+            await queue.put(page)
+
+    tasks = [asyncio.create_task(pull(f)) for f in _shard_filters(date_field, start_date, end_date)]
+
+    async def finish():
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await queue.put(None)
+
+    finisher = asyncio.create_task(finish())
+    try:
+        while (page := await queue.get()) is not None:
+            yield page
+        await finisher  # Surface a failed shard
+    finally:
+        for task in (*tasks, finisher):
+            task.cancel()
+
+
+async def _iterate_sharded(
+    shop_url: str,
+    token: str,
+    connection: str,
+    node_fields: str,
+    date_field: str,
+    start_date: date,
+    end_date: date,
+) -> List[Dict[str, Any]]:
+    """Fetch every shard of a date-ranged connection into one list (see _iterate_sharded_pages)."""
+    return [
+        node
+        async for page in _iterate_sharded_pages(shop_url, token, connection, node_fields, date_field, start_date, end_date)
+        for node in page
+    ]
+
+
 # ---------------------------------------------------------------------------
-# 📦 Convenience Fetchers (Updated for date range)
+# 🚚 Bulk Operations (server-side export, streamed as JSONL)
 # ---------------------------------------------------------------------------
-def get_all_orders(shop_url: str, token: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+async def _run_bulk_operation(shop_url: str, token: str, bulk_query: str) -> Optional[str]:
     """
-    Fetch all orders for the given Shopify store, optionally within a date range.
-    Date format: 'YYYY-MM-DD'
+    Submit a bulkOperationRunQuery and poll (with backoff) until it finishes.
+    Returns the JSONL result URL, or None if the job failed or matched nothing.
     """
+    async with _bulk_semaphore:
+        started = await _graphql(shop_url, token, BULK_RUN_MUTATION, {"query": bulk_query})
+        run = (started.get("data") or {}).get("bulkOperationRunQuery") or {}
+        if run.get("userErrors") or not run.get("bulkOperation"):
+            logger.error("[Shopify Bulk] Could not start bulk operation: %s", run.get('userErrors'))
+            return None
+
+        delay = BULK_POLL_INITIAL
+        while True:
+            await asyncio.sleep(delay)
+            status = await _graphql(shop_url, token, BULK_STATUS_QUERY)
+            operation = (status.get("data") or {}).get("currentBulkOperation") or {}
+            state = operation.get("status")
+            if state == "COMPLETED":
+                logger.info("[Shopify Bulk] Completed with %s objects", operation.get('objectCount'))
+                return operation.get("url")
+            if state not in ("CREATED", "RUNNING"):
+                logger.error("[Shopify Bulk] Operation ended with %s (%s)", state, operation.get('errorCode'))
+                return None
+            delay = min(delay * 2, BULK_POLL_MAX)
+
+
+async def iter_bulk_query(shop_url: str, token: str, bulk_query: str) -> AsyncIterator[Dict[str, Any]]:
+    """Run a bulk query and yield its result objects one by one from the streamed JSONL."""
+    url = await _run_bulk_operation(shop_url, token, bulk_query)
+    if not url:
+        return
+
+    async with http_client.stream("GET", url, timeout=httpx.Timeout(60.0, connect=5.0)) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line:
+                yield orjson.loads(line)
+
+
+def _bulk_connection_query(connection: str, node_fields: str, query_filter: Optional[str] = None) -> str:
+    """Bulk queries take no first/after arguments: Shopify walks the whole connection."""
+    filter_args = f'(query: "{query_filter}")' if query_filter else ""
+    return f"{{ {connection}{filter_args} {{ edges {{ node {{ {node_fields} }} }} }} }}"
+
+
+def iter_bulk_orders(
+    shop_url: str,
+    token: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream all orders via a bulk operation (flat fields: one JSONL line per order)."""
     fields = """
       id name processedAt displayFinancialStatus displayFulfillmentStatus
       totalPriceSet { shopMoney { amount currencyCode } }
-      lineItems(first: 50) { edges { node { title quantity variant { price } } } }
     """
+    query_filter = f"created_at:>={start_date} AND created_at:<={end_date}" if start_date and end_date else None
+    return iter_bulk_query(shop_url, token, _bulk_connection_query("orders", fields, query_filter))
 
-    query_filter = None
-    if start_date and end_date:
-        query_filter = f"created_at:>={start_date} AND created_at:<={end_date}"
-        logger.info(f"[Shopify Orders] Historical pull from {start_date} to {end_date}")
 
-    return _iterate(shop_url, token, "orders", fields, query_filter=query_filter)
+def iter_bulk_products(
+    shop_url: str,
+    token: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream all products via a bulk operation (flat fields: one JSONL line per product)."""
+    fields = "id title handle status totalInventory productType vendor createdAt updatedAt"
+    query_filter = f"updated_at:>={start_date} AND updated_at:<={end_date}" if start_date and end_date else None
+    return iter_bulk_query(shop_url, token, _bulk_connection_query("products", fields, query_filter))
 
 
-def get_all_products(shop_url: str, token: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Fetch all products with variants (optionally filtered by update date)."""
-    fields = """
-      id title handle status totalInventory productType vendor createdAt updatedAt
-      variants(first: 50) { edges { node { id title price inventoryQuantity } } }
+# ---------------------------------------------------------------------------
+# 📦 Convenience Fetchers (Updated for date range)
+# ---------------------------------------------------------------------------
+ORDER_FIELDS = """
+  id name processedAt displayFinancialStatus displayFulfillmentStatus
+  totalPriceSet { shopMoney { amount currencyCode } }
+  lineItems(first: 50) { edges { node { title quantity variant { price } } } }
+"""
+PRODUCT_FIELDS = """
+  id title handle status totalInventory productType vendor createdAt updatedAt
+  variants(first: 50) { edges { node { id title price inventoryQuantity } } }
+"""
+CUSTOMER_FIELDS = "id email firstName lastName state createdAt updatedAt verifiedEmail"
+# Resources whose sync may resume from an updated_at watermark. Orders always
+# re-pull in full: their daily insights are rebuilt from the complete order set.
+INCREMENTAL_RESOURCES = ("products", "customers")
+
+
+def _iterate_ranged_pages(
+    shop_url: str,
+    token: str,
+    connection: str,
+    node_fields: str,
+    date_field: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    updated_since: Optional[str] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Sharded pages for a date range; otherwise one cursor chain over the whole
+    connection, or only over records updated since an ISO-8601 watermark.
     """
-    query_filter = None
     if start_date and end_date:
-        query_filter = f"updated_at:>={start_date} AND updated_at:<={end_date}"
-        logger.info(f"[Shopify Products] Historical pull {start_date} → {end_date}")
-    return _iterate(shop_url, token, "products", fields, query_filter=query_filter)
+        logger.info("[Shopify %s] Historical pull %s → %s", connection.title(), start_date, end_date)
+        return _iterate_sharded_pages(shop_url, token, connection, node_fields, date_field, start_date, end_date)
+    if updated_since:
+        logger.info("[Shopify %s] Incremental pull since %s", connection.title(), updated_since)
+        return _iterate_pages(shop_url, token, connection, node_fields, query_filter=f"updated_at:>='{updated_since}'")
+    return _iterate_pages(shop_url, token, connection, node_fields)
 
 
-def get_all_customers(shop_url: str, token: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Fetch all customers (optionally by update date)."""
-    fields = "id email firstName lastName state createdAt updatedAt verifiedEmail"
-    query_filter = None
-    if start_date and end_date:
-        query_filter = f"updated_at:>={start_date} AND updated_at:<={end_date}"
-        logger.info(f"[Shopify Customers] Historical pull {start_date} → {end_date}")
-    return _iterate(shop_url, token, "customers", fields, query_filter=query_filter)
+def iter_order_pages(shop_url: str, token: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Page through all orders, optionally by creation date (sharded when ranged)."""
+    return _iterate_ranged_pages(shop_url, token, "orders", ORDER_FIELDS, "created_at", start_date, end_date)
 
 
-def get_all_collections(shop_url: str, token: str) -> List[Dict[str, Any]]:
-    """Fetch all collections."""
-    fields = "id title handle updatedAt"
-    return _iterate(shop_url, token, "collections", fields)
+def iter_product_pages(
+    shop_url: str,
+    token: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    updated_since: Optional[str] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Page through all products with variants, optionally by update date (sharded when ranged)."""
+    return _iterate_ranged_pages(shop_url, token, "products", PRODUCT_FIELDS, "updated_at", start_date, end_date, updated_since)
 
 
-def get_inventory_levels(shop_url: str, token: str) -> List[Dict[str, Any]]:
-    """Fetch all inventory levels via product variants."""
-    fields = """
-      id sku inventoryQuantity
-      inventoryItem { id }
-      product { id title }
+def iter_customer_pages(
+    shop_url: str,
+    token: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    updated_since: Optional[str] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Page through all customers, optionally by update date (sharded when ranged)."""
+    return _iterate_ranged_pages(shop_url, token, "customers", CUSTOMER_FIELDS, "updated_at", start_date, end_date, updated_since)
+
+
+async def get_all_orders(shop_url: str, token: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
     """
-    return _iterate(shop_url, token, "productVariants", fields)
+    Fetch all orders for the given Shopify store, optionally within a date range.
+    Date format: 'YYYY-MM-DD'
+    """
+    if start_date and end_date:
+        logger.info("[Shopify Orders] Historical pull from %s to %s", start_date, end_date)
+        return await _iterate_sharded(shop_url, token, "orders", ORDER_FIELDS, "created_at", start_date, end_date)
+
+    return await _iterate(shop_url, token, "orders", ORDER_FIELDS)
 
 
-def get_all_collections(
+async def get_all_products(shop_url: str, token: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Fetch all products with variants (optionally filtered by update date)."""
+    if start_date and end_date:
+        logger.info("[Shopify Products] Historical pull %s → %s", start_date, end_date)
+        return await _iterate_sharded(shop_url, token, "products", PRODUCT_FIELDS, "updated_at", start_date, end_date)
+    return await _iterate(shop_url, token, "products", PRODUCT_FIELDS)
+
+
+async def get_all_customers(shop_url: str, token: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Fetch all customers (optionally filtered by update date)."""
+    if start_date and end_date:
+        logger.info("[Shopify Customers] Historical pull %s → %s", start_date, end_date)
+        return await _iterate_sharded(shop_url, token, "customers", CUSTOMER_FIELDS, "updated_at", start_date, end_date)
+    return await _iterate(shop_url, token, "customers", CUSTOMER_FIELDS)
+
+
+def iter_collection_pages(
     shop_url: str,
     token: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-) -> List[Dict[str, Any]]:
-    """Fetch all collections (manual or smart), optionally filtered by update date."""
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Page through all collections (manual or smart), optionally filtered by update date."""
     fields = "id title handle updatedAt"
     query_filter = None
     if start_date and end_date:
         query_filter = f"updated_at:>={start_date} AND updated_at:<={end_date}"
-        logger.info(f"[Shopify Collections] Historical pull {start_date} → {end_date}")
-    return _iterate(shop_url, token, "collections", fields, query_filter=query_filter)
+        logger.info("[Shopify Collections] Historical pull %s → %s", start_date, end_date)
+    return _iterate_pages(shop_url, token, "collections", fields, query_filter=query_filter)
 
 
-def get_inventory_levels(
+def iter_inventory_pages(
     shop_url: str,
     token: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-) -> List[Dict[str, Any]]:
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
     """
-    Fetch all inventory levels via product variants, optionally filtered by update date.
+    Page through all inventory levels via product variants, optionally filtered by update date.
     """
     fields = """
       id sku inventoryQuantity updatedAt
@@ -230,9 +510,25 @@ def get_inventory_levels(
     query_filter = None
     if start_date and end_date:
         query_filter = f"updated_at:>={start_date} AND updated_at:<={end_date}"
-        logger.info(f"[Shopify Inventory] Historical pull {start_date} → {end_date}")
-    return _iterate(shop_url, token, "productVariants", fields, query_filter=query_filter)
+        logger.info("[Shopify Inventory] Historical pull %s → %s", start_date, end_date)
+    return _iterate_pages(shop_url, token, "productVariants", fields, query_filter=query_filter)
 
 
+async def get_all_collections(
+    shop_url: str,
+    token: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Fetch all collections into one list (see iter_collection_pages)."""
+    return [node async for page in iter_collection_pages(shop_url, token, start_date, end_date) for node in page]
 
 
+async def get_inventory_levels(
+    shop_url: str,
+    token: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Fetch all inventory levels into one list (see iter_inventory_pages)."""
+    return [node async for page in iter_inventory_pages(shop_url, token, start_date, end_date) for node in page]
@@ -0,0 +1,50 @@
+"""
+One-off migration: cast stored Meta demographic metrics from strings to numbers.
+Run once after deploying numeric writes in save_demographics, so that
+get_item_demographics can $sum the fields directly.
+"""
+
+from app.database.mongo_client import db
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+COLLECTIONS = [
+    "meta_demographics_campaign",
+    "meta_demographics_adset",
+    "meta_demographics_ad",
+]
+
+# Pipeline-style update: converts in place on the server, no round-trip per doc
+NUMERIC_CAST = [
+    {"$set": {
+        "impressions": {"$toInt": {"$ifNull": ["$impressions", 0]}},
+        "clicks": {"$toInt": {"$ifNull": ["$clicks", 0]}},
+        "spend": {"$toDouble": {"$ifNull": ["$spend", 0]}},
+        "reach": {"$toInt": {"$ifNull": ["$reach", 0]}},
+    }}
+]
+
+STRING_METRICS = {"$or": [
+    {"impressions": {"$type": "string"}},
+    {"clicks": {"$type": "string"}},
+    {"spend": {"$type": "string"}},
+    {"reach": {"$type": "string"}},
+]}
+
+
+def migrate_demographics():
+    print("\n" + "="*80)
+    print("META DEMOGRAPHICS → NUMERIC METRICS")
+    print("="*80)
+
+    for coll_name in COLLECTIONS:
+        result = db[coll_name].update_many(STRING_METRICS, NUMERIC_CAST)
+        print(f"📊 {coll_name}: matched={result.matched_count}, modified={result.modified_count}")
+        logger.info(f"[Migration] {coll_name} numeric cast → modified={result.modified_count}")
+
+    print("="*80 + "\n")
+
+
+if __name__ == "__main__":
+    migrate_demographics()
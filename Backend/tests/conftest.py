@@ -0,0 +1,10 @@
+"""
+Shared pytest setup for the unit tests.
+
+app.utils.security builds its JWT key at import, so a secret must exist before
+any app module is imported. A real .env, when present, still takes precedence.
+"""
+
+import os
+
+os.environ.setdefault("JWT_SECRET_KEY", "unit-test-secret")
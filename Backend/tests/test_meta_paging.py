@@ -0,0 +1,104 @@
+"""
+Unit tests for the cursor-paged reads behind the Meta dashboard routes.
+
+Location: Backend/tests/test_meta_paging.py
+
+Usage:
+    python -m pytest tests/test_meta_paging.py
+
+Motor is replaced by a thin async wrapper over mongomock (requirements-dev.txt).
+"""
+
+import asyncio
+
+import mongomock
+import pytest
+
+from app.controllers import meta_controller
+from app.controllers.meta_controller import _get_data_from_db
+
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._cursor)[:length]
+
+
+class _AsyncCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return _AsyncCursor(self._collection.find(*args, **kwargs))
+
+
+class _AsyncDB:
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, name):
+        return _AsyncCollection(self._db[name])
+
+
+@pytest.fixture
+def campaigns(monkeypatch):
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(meta_controller, "async_db", _AsyncDB(db))
+    collection = db["campaigns"]
+    collection.insert_many(
+        [{"id": f"c{i:02d}", "name": f"Campaign {i}", "status": "ACTIVE", "objective": "SALES",
+          "platform": "meta", "ad_account_id": "act_1", "spend_raw": i} for i in range(5)]
+        + [{"id": "c99", "name": "Other account", "platform": "meta", "ad_account_id": "act_2"}]
+    )
+    return collection
+
+
+def _page(limit, after=None):
+    return asyncio.run(_get_data_from_db("campaign", "act_1", limit, after))
+
+
+def test_pages_follow_next_until_exhausted(campaigns):
+    first = _page(2)
+    second = _page(2, first["next"])
+    last = _page(2, second["next"])
+
+    assert [row["id"] for row in first["data"]] == ["c00", "c01"]
+    assert first["next"] == "c01"
+    assert [row["id"] for row in second["data"]] == ["c02", "c03"]
+    assert [row["id"] for row in last["data"]] == ["c04"]
+    assert last["next"] is None
+
+
+def test_full_final_page_needs_one_more_empty_read(campaigns):
+    page = _page(5)
+
+    assert len(page["data"]) == 5
+    assert page["next"] == "c04"
+    assert _page(5, page["next"]) == {"data": [], "next": None}
+
+
+def test_only_read_fields_of_the_requested_account_are_returned(campaigns):
+    rows = _page(10)["data"]
+
+    assert {row["id"] for row in rows} == {f"c{i:02d}" for i in range(5)}
+    assert set(rows[0]) == {"id", "name", "status", "objective"}
+
+
+def test_read_failure_returns_an_empty_last_page(monkeypatch):
+    class _Broken:
+        def __getitem__(self, name):
+            raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(meta_controller, "async_db", _Broken())
+
+    assert _page(2) == {"data": [], "next": None}
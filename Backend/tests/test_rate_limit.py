@@ -0,0 +1,93 @@
+"""
+Unit tests for the per-user sliding-window limiter guarding sync routes.
+
+Location: Backend/tests/test_rate_limit.py
+
+Usage:
+    python -m pytest tests/test_rate_limit.py
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils import security
+from app.utils.security import JWTAuthMiddleware, SlidingWindowLimiter, create_access_token
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(security.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def client():
+    limiter = SlidingWindowLimiter(limit=2, window_seconds=60)
+    app = FastAPI()
+    app.add_middleware(JWTAuthMiddleware)
+
+    @app.post("/sync/{user_id}")
+    def sync(user_id: str, _: None = Depends(limiter)):
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def _auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': f'{user_id}@example.com', 'user_id': user_id})}"}
+
+
+def test_third_call_in_window_is_throttled(client, clock):
+    headers = _auth("u1")
+
+    assert client.post("/sync/u1", headers=headers).status_code == 200
+    assert client.post("/sync/u1", headers=headers).status_code == 200
+    response = client.post("/sync/u1", headers=headers)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+
+
+def test_limit_follows_the_token_not_the_path(client, clock):
+    headers = _auth("u1")
+    for path_user in ("a", "b"):
+        assert client.post(f"/sync/{path_user}", headers=headers).status_code == 200
+
+    assert client.post("/sync/c", headers=headers).status_code == 429
+
+
+def test_users_are_limited_independently(client, clock):
+    for _ in range(2):
+        client.post("/sync/u1", headers=_auth("u1"))
+
+    assert client.post("/sync/u2", headers=_auth("u2")).status_code == 200
+
+
+def test_hits_expire_with_the_window(client, clock):
+    headers = _auth("u1")
+    client.post("/sync/u1", headers=headers)
+    clock.now += 30
+    client.post("/sync/u1", headers=headers)
+
+    clock.now += 29
+    response = client.post("/sync/u1", headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+    clock.now += 1  # The first hit is now a full window old
+    assert client.post("/sync/u1", headers=headers).status_code == 200
+
+
+def test_missing_or_invalid_token_is_unauthorized(client, clock):
+    assert client.post("/sync/u1").status_code == 401
+    assert client.post("/sync/u1", headers={"Authorization": "Bearer not-a-jwt"}).status_code == 401
@@ -0,0 +1,105 @@
+"""
+Unit tests for the chunked campaign/adset/ad upserts in save_items.
+
+Location: Backend/tests/test_save_items.py
+
+Usage:
+    python -m pytest tests/test_save_items.py
+
+Runs against mongomock (requirements-dev.txt); no MongoDB server is needed.
+"""
+
+import mongomock
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.database import mongo_client
+from app.database.mongo_client import save_items
+
+
+class _RecordingCollection:
+    """Wraps a mongomock collection and records each bulk_write's size. The call
+    numbered `fail_on` applies all but its first op and raises BulkWriteError,
+    as a partially failed unordered bulk_write does."""
+
+    def __init__(self, collection, fail_on=None):
+        self._collection = collection
+        self._fail_on = fail_on
+        self.batch_sizes = []
+
+    def bulk_write(self, ops, ordered=True):
+        self.batch_sizes.append(len(ops))
+        if len(self.batch_sizes) == self._fail_on:
+            good = self._collection.bulk_write(ops[1:], ordered=ordered)
+            raise BulkWriteError({
+                "writeErrors": [{"index": 0, "code": 11000, "errmsg": "E11000 duplicate key"}],
+                "nUpserted": good.upserted_count,
+                "nMatched": good.matched_count,
+            })
+        return self._collection.bulk_write(ops, ordered=ordered)
+
+
+class _FakeDB:
+    def __init__(self, collections):
+        self._collections = collections
+
+    def __getitem__(self, name):
+        return self._collections[name]
+
+
+@pytest.fixture
+def campaigns():
+    return mongomock.MongoClient().db["campaigns"]
+
+
+def _use_collection(monkeypatch, collection):
+    monkeypatch.setattr(mongo_client, "db", _FakeDB({"campaigns": collection}))
+
+
+def test_generator_input_is_written_in_chunks(monkeypatch, campaigns):
+    monkeypatch.setattr(mongo_client, "BULK_WRITE_CHUNK", 3)
+    wrapper = _RecordingCollection(campaigns)
+    _use_collection(monkeypatch, wrapper)
+
+    save_items("campaigns", "act_1", ({"id": str(i), "name": f"c{i}"} for i in range(8)), "meta")
+
+    assert wrapper.batch_sizes == [3, 3, 2]
+    assert campaigns.count_documents({"platform": "meta", "ad_account_id": "act_1"}) == 8
+
+
+def test_records_without_an_id_are_skipped(monkeypatch, campaigns):
+    _use_collection(monkeypatch, campaigns)
+    items = [{"id": "1"}, {"name": "no id"}, {"campaign_id": "2"}, {"resourceName": "customers/1/campaigns/3"}]
+
+    save_items("campaigns", "act_1", items, "google")
+
+    # Whichever key supplied the identifier becomes the upsert's "id"
+    assert sorted(doc["id"] for doc in campaigns.find({})) == ["1", "2", "customers/1/campaigns/3"]
+
+
+def test_rerun_updates_instead_of_duplicating(monkeypatch, campaigns):
+    _use_collection(monkeypatch, campaigns)
+
+    save_items("campaigns", "act_1", [{"id": "1", "status": "ACTIVE"}], "meta")
+    save_items("campaigns", "act_1", [{"id": "1", "status": "PAUSED"}], "meta")
+
+    assert campaigns.count_documents({}) == 1
+    assert campaigns.find_one({"id": "1"})["status"] == "PAUSED"
+
+
+def test_partial_bulk_write_error_does_not_stop_later_chunks(monkeypatch, campaigns):
+    monkeypatch.setattr(mongo_client, "BULK_WRITE_CHUNK", 2)
+    wrapper = _RecordingCollection(campaigns, fail_on=2)
+    _use_collection(monkeypatch, wrapper)
+
+    save_items("campaigns", "act_1", [{"id": str(i)} for i in range(6)], "meta")
+
+    assert wrapper.batch_sizes == [2, 2, 2]
+    # Op 0 of the failing chunk (id "2") is the only record missing
+    assert sorted(doc["id"] for doc in campaigns.find({})) == ["0", "1", "3", "4", "5"]
+
+
+def test_log_bulk_write_error_returns_the_counters():
+    error = BulkWriteError({"writeErrors": [], "nUpserted": 4, "nMatched": 1})
+    details = mongo_client._log_bulk_write_error("[test]", error)
+    assert (details["nUpserted"], details["nMatched"]) == (4, 1)
@@ -0,0 +1,103 @@
+"""
+Unit tests for Shopify OAuth callback validation.
+
+Location: Backend/tests/test_shopify_hmac.py
+
+Usage:
+    python -m pytest tests/test_shopify_hmac.py
+"""
+
+import hashlib
+import hmac
+
+import pytest
+
+from app.controllers.shopify_controller import _CALLBACK_SHOP_RE
+from app.services.shopify_service import verify_shopify_hmac
+
+SECRET = "shpss_test_secret"
+
+
+def _sign(message: str) -> str:
+    return hmac.new(SECRET.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+# ============================================================================
+# verify_shopify_hmac
+# ============================================================================
+
+def test_accepts_sorted_canonical_message():
+    params = {"timestamp": "1700000000", "shop": "demo.myshopify.com", "code": "abc123"}
+    signature = _sign("code=abc123&shop=demo.myshopify.com&timestamp=1700000000")
+    assert verify_shopify_hmac({**params, "hmac": signature}, signature, SECRET)
+
+
+def test_uppercase_hex_signature_is_accepted():
+    signature = _sign("shop=demo.myshopify.com")
+    params = {"shop": "demo.myshopify.com", "hmac": signature}
+    assert verify_shopify_hmac(params, signature.upper(), SECRET)
+
+
+def test_hmac_and_signature_params_are_not_signed():
+    signature = _sign("code=abc&shop=demo.myshopify.com")
+    params = {"code": "abc", "shop": "demo.myshopify.com", "hmac": signature, "signature": "legacy"}
+    assert verify_shopify_hmac(params, signature, SECRET)
+
+
+def test_values_escape_percent_and_ampersand_only():
+    # "=" stays literal inside a value; "%" and "&" are escaped
+    params = {"state": "a=b&c%d", "shop": "demo.myshopify.com"}
+    signature = _sign("shop=demo.myshopify.com&state=a=b%26c%25d")
+    assert verify_shopify_hmac(params, signature, SECRET)
+
+
+def test_keys_also_escape_equals():
+    params = {"we=ird&key": "v"}
+    signature = _sign("we%3Dird%26key=v")
+    assert verify_shopify_hmac(params, signature, SECRET)
+
+
+def test_tampered_value_is_rejected():
+    signature = _sign("code=abc&shop=demo.myshopify.com")
+    params = {"code": "abd", "shop": "demo.myshopify.com"}
+    assert not verify_shopify_hmac(params, signature, SECRET)
+
+
+def test_wrong_secret_is_rejected():
+    signature = _sign("shop=demo.myshopify.com")
+    assert not verify_shopify_hmac({"shop": "demo.myshopify.com"}, signature, "other-secret")
+
+
+@pytest.mark.parametrize("received", ["", "ab" * 31, "ab" * 33, "zz" * 32])
+def test_malformed_signature_is_rejected(received):
+    assert not verify_shopify_hmac({"shop": "demo.myshopify.com"}, received, SECRET)
+
+
+# ============================================================================
+# _CALLBACK_SHOP_RE
+# ============================================================================
+
+@pytest.mark.parametrize("shop", [
+    "demo.myshopify.com",
+    "Demo-Store.MyShopify.com",
+    "a.myshopify.com",
+    "0" + "x" * 59 + ".myshopify.com",
+])
+def test_callback_shop_accepts_myshopify_domains(shop):
+    assert _CALLBACK_SHOP_RE.match(shop)
+
+
+@pytest.mark.parametrize("shop", [
+    "https://demo.myshopify.com",
+    "demo.myshopify.com/",
+    "demo.myshopify.com.evil.com",
+    "evil.com",
+    "demo",
+    "-demo.myshopify.com",
+    "de_mo.myshopify.com",
+    "sub.demo.myshopify.com",
+    "x" * 61 + ".myshopify.com",
+    "demo.myshopify.com\n",
+])
+def test_callback_shop_rejects_other_hosts(shop):
+    assert not _CALLBACK_SHOP_RE.match(shop)
@@ -0,0 +1,259 @@
+"""
+Unit tests for the Shopify GraphQL pager: date shards, throttling and failures.
+
+Location: Backend/tests/test_shopify_pagination.py
+
+Usage:
+    python -m pytest tests/test_shopify_pagination.py
+
+Shopify is replaced by an httpx.MockTransport; no network access is needed.
+"""
+
+import asyncio
+import re
+from datetime import date
+
+import httpx
+import orjson
+import pytest
+
+from app.services.shopify_service import latest_updated_at
+from app.utils import shopify_api
+from app.utils.shopify_api import (
+    ShopifyAPIError,
+    _graphql,
+    _iterate_pages,
+    _iterate_sharded_pages,
+    _shard_filters,
+    _throttle_delay,
+)
+
+SHOP = "demo.myshopify.com"
+_WINDOW_RE = re.compile(r"created_at:>=(\S+) AND created_at:(<=?)(\S+)")
+
+
+@pytest.fixture(autouse=True)
+def _isolated_api(monkeypatch):
+    """Fresh per-shop gates per test (each test runs its own event loop) and no real waits."""
+    monkeypatch.setattr(shopify_api, "_shop_semaphores", {})
+    monkeypatch.setattr(shopify_api, "THROTTLE_MIN_WAIT", 0.0)
+
+
+def _use_transport(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(shopify_api, "http_client", client)
+    return client
+
+
+def _page(connection, nodes, has_next, cursor_prefix="c"):
+    return {"data": {connection: {
+        "edges": [{"cursor": f"{cursor_prefix}{i}", "node": node} for i, node in enumerate(nodes)],
+        "pageInfo": {"hasNextPage": has_next},
+    }}}
+
+
+THROTTLED = {
+    "errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}],
+    "extensions": {"cost": {
+        "requestedQueryCost": 202,
+        "throttleStatus": {"maximumAvailable": 1000.0, "currentlyAvailable": 2, "restoreRate": 50.0},
+    }},
+}
+
+
+# ============================================================================
+# _shard_filters
+# ============================================================================
+
+def _windows(start, end):
+    return [_WINDOW_RE.fullmatch(f).groups() for f in _shard_filters("created_at", start, end)]
+
+
+def test_shards_are_contiguous_and_half_open_except_the_last(monkeypatch):
+    monkeypatch.setattr(shopify_api, "SHARD_DAYS", 30)
+    windows = _windows(date(2024, 1, 1), date(2024, 3, 15))
+
+    assert windows == [
+        ("2024-01-01", "<", "2024-01-31"),
+        ("2024-01-31", "<", "2024-03-01"),
+        ("2024-03-01", "<=", "2024-03-15"),
+    ]
+
+
+def test_window_ending_exactly_on_end_date_stays_exclusive(monkeypatch):
+    monkeypatch.setattr(shopify_api, "SHARD_DAYS", 10)
+    windows = _windows(date(2024, 1, 1), date(2024, 1, 11))
+
+    # The day-10 boundary equals end_date: it is covered by the closing one-day window
+    assert windows == [
+        ("2024-01-01", "<", "2024-01-11"),
+        ("2024-01-11", "<=", "2024-01-11"),
+    ]
+
+
+def test_single_day_range_is_one_closed_window():
+    assert _windows(date(2024, 5, 1), date(2024, 5, 1)) == [("2024-05-01", "<=", "2024-05-01")]
+
+
+def test_inverted_range_has_no_windows():
+    assert _shard_filters("created_at", date(2024, 5, 2), date(2024, 5, 1)) == []
+
+
+# ============================================================================
+# _iterate_sharded_pages
+# ============================================================================
+
+def test_sharded_pages_cover_every_window_and_cursor(monkeypatch):
+    monkeypatch.setattr(shopify_api, "SHARD_DAYS", 7)
+    seen_filters = set()
+
+    def handler(request):
+        body = orjson.loads(request.content)
+        query_filter = re.search(r'query: "([^"]+)"', body["query"]).group(1)
+        seen_filters.add(query_filter)
+        cursor = body["variables"]["cursor"]
+        page_no = 0 if cursor is None else int(cursor.split("-")[0][1:]) + 1
+        nodes = [{"id": f"{query_filter}#{page_no}"}]
+        return httpx.Response(200, json=_page("orders", nodes, page_no < 2, f"p{page_no}-"))
+
+    _use_transport(monkeypatch, handler)
+    start, end = date(2024, 1, 1), date(2024, 2, 4)
+
+    async def collect():
+        return [node["id"] async for page in _iterate_sharded_pages(
+            SHOP, "token", "orders", "id", "created_at", start, end
+        ) for node in page]
+
+    ids = asyncio.run(collect())
+    filters = _shard_filters("created_at", start, end)
+
+    assert seen_filters == set(filters)
+    assert sorted(ids) == sorted(f"{f}#{n}" for f in filters for n in range(3))
+
+
+def test_sharded_pages_surface_a_failed_window(monkeypatch):
+    monkeypatch.setattr(shopify_api, "SHARD_DAYS", 7)
+
+    def handler(request):
+        if "2024-01-08" in orjson.loads(request.content)["query"]:
+            return httpx.Response(500)
+        return httpx.Response(200, json=_page("orders", [{"id": 1}], False))
+
+    _use_transport(monkeypatch, handler)
+
+    async def drain():
+        async for _ in _iterate_sharded_pages(SHOP, "t", "orders", "id", "created_at", date(2024, 1, 1), date(2024, 1, 20)):
+            pass
+
+    with pytest.raises(ShopifyAPIError):
+        asyncio.run(drain())
+
+
+# ============================================================================
+# _graphql throttling
+# ============================================================================
+
+def test_throttle_delay_waits_for_the_cost_deficit():
+    assert _throttle_delay(THROTTLED, attempt=0) == pytest.approx((202 - 2) / 50.0)
+
+
+def test_throttle_delay_is_clamped(monkeypatch):
+    monkeypatch.setattr(shopify_api, "THROTTLE_MIN_WAIT", 1.0)
+    huge = {"extensions": {"cost": {"requestedQueryCost": 10_000, "throttleStatus": {"currentlyAvailable": 0, "restoreRate": 1.0}}}}
+    ready = {"extensions": {"cost": {"requestedQueryCost": 1, "throttleStatus": {"currentlyAvailable": 500, "restoreRate": 50.0}}}}
+
+    assert _throttle_delay(huge, 0) == shopify_api.THROTTLE_MAX_WAIT
+    assert _throttle_delay(ready, 0) == 1.0
+    assert _throttle_delay({}, 2) == 4.0  # No cost info: exponential backoff
+
+
+def test_graphql_retries_throttled_then_succeeds(monkeypatch):
+    monkeypatch.setattr(shopify_api, "_throttle_delay", lambda data, attempt: 0)
+    responses = iter([THROTTLED, THROTTLED, {"data": {"shop": {"id": "1"}}}])
+    _use_transport(monkeypatch, lambda request: httpx.Response(200, json=next(responses)))
+
+    assert asyncio.run(_graphql(SHOP, "t", "query { shop { id } }")) == {"data": {"shop": {"id": "1"}}}
+
+
+def test_graphql_raises_once_retries_are_exhausted(monkeypatch):
+    monkeypatch.setattr(shopify_api, "_throttle_delay", lambda data, attempt: 0)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=THROTTLED)
+
+    _use_transport(monkeypatch, handler)
+
+    with pytest.raises(ShopifyAPIError):
+        asyncio.run(_graphql(SHOP, "t", "query { shop { id } }"))
+    assert len(calls) == shopify_api.GRAPHQL_MAX_RETRIES + 1
+
+
+def test_graphql_retries_http_429(monkeypatch):
+    responses = iter([
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"data": {"ok": True}}),
+    ])
+    _use_transport(monkeypatch, lambda request: next(responses))
+
+    assert asyncio.run(_graphql(SHOP, "t", "q")) == {"data": {"ok": True}}
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(500),
+    httpx.Response(200, content=b"<html>not json</html>"),
+    httpx.Response(200, json={"errors": [{"message": "Field 'nope' doesn't exist"}]}),
+])
+def test_graphql_failures_raise_instead_of_returning_none(monkeypatch, response):
+    _use_transport(monkeypatch, lambda request: response)
+
+    with pytest.raises(ShopifyAPIError):
+        asyncio.run(_graphql(SHOP, "t", "q"))
+
+
+def test_shop_gate_caps_concurrent_requests(monkeypatch):
+    monkeypatch.setattr(shopify_api, "SHOP_CONCURRENCY", 2)
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"data": {}})
+
+    _use_transport(monkeypatch, handler)
+
+    async def burst():
+        await asyncio.gather(*(_graphql(SHOP, "t", "q") for _ in range(8)))
+
+    asyncio.run(burst())
+    assert peak == 2
+
+
+def test_malformed_page_raises(monkeypatch):
+    _use_transport(monkeypatch, lambda request: httpx.Response(200, json={"data": {"products": None}}))
+
+    async def drain():
+        async for _ in _iterate_pages(SHOP, "t", "products", "id"):
+            pass
+
+    with pytest.raises(ShopifyAPIError):
+        asyncio.run(drain())
+
+
+# ============================================================================
+# latest_updated_at (sync watermarks)
+# ============================================================================
+
+def test_latest_updated_at_picks_the_newest_timestamp():
+    records = [
+        {"updatedAt": "2024-03-01T10:00:00Z"},
+        {"updatedAt": None},
+        {"updatedAt": "2024-03-02T09:00:00Z"},
+        {},
+    ]
+    assert latest_updated_at(records) == "2024-03-02T09:00:00Z"
+    assert latest_updated_at([{}]) is None
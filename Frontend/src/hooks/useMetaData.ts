@@ -51,6 +51,22 @@ interface AggregatedInsights {
   [id: string]: Omit<MetaInsights, "frequency">;
 }
 
+// The list endpoints return one id-ordered page plus a `next` cursor (null on the last page)
+const META_PAGE_LIMIT = 1000;
+
+const fetchAllPages = async (path: string): Promise<any[]> => {
+  const items: any[] = [];
+  let after: string | null = null;
+  do {
+    const res = await apiClient.get(path, {
+      params: { limit: META_PAGE_LIMIT, ...(after ? { after } : {}) },
+    });
+    items.push(...(res.data.data || []));
+    after = res.data.next ?? null;
+  } while (after);
+  return items;
+};
+
 export const useMetaData = (
   userId: string | null,
   adAccountId: string | null | undefined,
@@ -110,41 +126,41 @@ export const useMetaData = (
     });
 
     try {
-      const [campaignsRes, adsetsRes, adsRes] = await Promise.all([
-        apiClient.get(`/meta/campaigns/${userId}/${adAccountId}`),
-        apiClient.get(`/meta/adsets/${userId}/${adAccountId}`),
-        apiClient.get(`/meta/ads/${userId}/${adAccountId}`),
+      const [campaigns, adsets, ads] = await Promise.all([
+        fetchAllPages(`/meta/campaigns/${userId}/${adAccountId}`),
+        fetchAllPages(`/meta/adsets/${userId}/${adAccountId}`),
+        fetchAllPages(`/meta/ads/${userId}/${adAccountId}`),
       ]);
 
       setCampaignsBasic(
-        campaignsRes.data.data?.map((c: any) => ({
+        campaigns.map((c: any) => ({
           id: c.id,
           name: c.name,
           status: c.status,
           objective: c.objective,
-        })) || []
+        }))
       );
       setError((prev) => ({ ...prev, campaignsBasic: null }));
 
       setAdSetsBasic(
-        adsetsRes.data.data?.map((a: any) => ({
+        adsets.map((a: any) => ({
           id: a.id,
           name: a.name,
           status: a.status,
           daily_budget: a.daily_budget,
           campaign_id: a.campaign_id || a.campaign?.id || "",
-        })) || []
+        }))
       );
       setError((prev) => ({ ...prev, adSetsBasic: null }));
 
       setAdsBasic(
-        adsRes.data.data?.map((a: any) => ({
+        ads.map((a: any) => ({
           id: a.id,
           name: a.name,
           status: a.status,
           adset_id: a.adset_id,
           creative: a.creative,
-        })) || []
+        }))
       );
       setError((prev) => ({ ...prev, adsBasic: null }));
     } catch (e: any) {